@@ -3,23 +3,86 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, UploadFile, File, Form
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.responses import StreamingResponse
 
 from db.session import get_db
-from schemas.ai_schemas import RefreshRequest
+from llm.cache import llm_cache
+from llm.embeddings import embedding_store
+from llm.router import llm_router
+from schemas.ai_schemas import RefreshRequest, PrescreenResponse
 from schemas.candidate_schemas import CandidateResponse
-from services.ai_service import generate_answer, refresh_candidate
+from schemas.job_schemas import JobResponse, BatchGroupBy
+from services.ai_service import generate_answer, refresh_candidate, generate_answer_stream
+from services.job_service import enqueue_generate_job, enqueue_refresh_job, enqueue_batch_job, get_job_by_id, \
+    job_events
+from services.semantic_service import prescreen_files
+from services.youcontrol_cache import youcontrol_cache
+from services.youcontrol_client import youcontrol_client
 
 router = APIRouter(tags=["AI"])
 
 
 @router.post("/generate", response_model=CandidateResponse)
 async def generate(prompt: str | None = Form(None), position_id: UUID = Form(...), files: List[UploadFile] = File(...),
-                   websearch: bool = False,
+                   websearch: bool = False, no_cache: bool = False,
                    session: AsyncSession = Depends(get_db)):
-    return await generate_answer(prompt, position_id, files, websearch, session)
+    return await generate_answer(prompt, position_id, files, websearch, session, use_cache=not no_cache)
+
+
+@router.post("/generate/stream")
+async def generate_stream(prompt: str | None = Form(None), position_id: UUID = Form(...),
+                          files: List[UploadFile] = File(...), websearch: bool = False, no_cache: bool = False,
+                          session: AsyncSession = Depends(get_db)):
+    return StreamingResponse(generate_answer_stream(prompt, position_id, files, websearch, session,
+                                                    use_cache=not no_cache),
+                             media_type="text/event-stream")
 
 
 @router.post("/refresh/{candidate_id}", response_model=CandidateResponse)
 async def refresh(candidate_id: UUID, body: RefreshRequest | None = None, websearch: bool = False,
-                  session: AsyncSession = Depends(get_db)):
-    return await refresh_candidate(candidate_id, body.prompt if body else None, websearch, session)
+                  no_cache: bool = False, session: AsyncSession = Depends(get_db)):
+    return await refresh_candidate(candidate_id, body.prompt if body else None, websearch, session,
+                                   use_cache=not no_cache)
+
+
+@router.post("/prescreen", response_model=PrescreenResponse)
+async def prescreen(position_id: UUID = Form(...), files: List[UploadFile] = File(...),
+                    session: AsyncSession = Depends(get_db)):
+    return await prescreen_files(position_id, files, session)
+
+
+@router.post("/jobs/generate", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def generate_job(prompt: str | None = Form(None), position_id: UUID = Form(...),
+                       files: List[UploadFile] = File(...), websearch: bool = False,
+                       session: AsyncSession = Depends(get_db)):
+    return await enqueue_generate_job(prompt, position_id, files, websearch, session)
+
+
+@router.post("/jobs/refresh/{candidate_id}", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def refresh_job(candidate_id: UUID, body: RefreshRequest | None = None, websearch: bool = False,
+                      session: AsyncSession = Depends(get_db)):
+    return await enqueue_refresh_job(candidate_id, body.prompt if body else None, websearch, session)
+
+
+@router.post("/jobs/batch", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def batch_job(prompt: str | None = Form(None), position_id: UUID = Form(...),
+                    files: List[UploadFile] = File(...), websearch: bool = False,
+                    group_by: BatchGroupBy = BatchGroupBy.FILE, session: AsyncSession = Depends(get_db)):
+    return await enqueue_batch_job(prompt, position_id, files, websearch, group_by, session)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: UUID, session: AsyncSession = Depends(get_db)):
+    return await get_job_by_id(job_id, session)
+
+
+@router.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: UUID):
+    return StreamingResponse(job_events(job_id), media_type="text/event-stream")
+
+
+@router.get("/metrics")
+async def metrics():
+    return {"ollama": llm_router.metrics(), "cache": llm_cache.metrics(), "youcontrol": youcontrol_cache.metrics(),
+            "youcontrol_client": youcontrol_client.metrics(), "embeddings": embedding_store.metrics()}
@@ -1,23 +1,42 @@
-from uuid import UUID
 from typing import List
+from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
 from fastapi.params import Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from db.session import get_db
-from schemas.candidate_schemas import CandidateList, CandidateResponse
+from schemas.candidate_schemas import (CandidatePage, CandidateResponse, CandidateRanking, CandidateScore, RiskFlag,
+                                      CandidateSearchResult)
 from schemas.export_format import ExportFormat
-from services.candidate_service import get_all_candidates, get_candidate_by_id, delete_candidate_by_id
+from services.candidate_service import (get_all_candidates, get_candidate_by_id, delete_candidate_by_id,
+                                       rank_candidates, search_candidates)
 from services.export_service import export_candidate
 
 router = APIRouter(tags=["Candidate"])
 
 
-@router.get("/get-all", response_model=List[CandidateList])
-async def get_all(session: AsyncSession = Depends(get_db)):
-    return await get_all_candidates(session)
+@router.get("/get-all", response_model=CandidatePage)
+async def get_all(limit: int = Query(50, ge=1, le=500), after: UUID | None = None, position_id: UUID | None = None,
+                  min_score: float | None = None, max_score: float | None = None,
+                  session: AsyncSession = Depends(get_db)):
+    return await get_all_candidates(session, limit, after, position_id, min_score, max_score)
+
+
+@router.get("/ranking/{position_id}", response_model=List[CandidateRanking])
+async def ranking(position_id: UUID, sort_by: CandidateScore = CandidateScore.OVERALL_SCORE, descending: bool = True,
+                  limit: int = Query(20, ge=1, le=500), min_score: float | None = None,
+                  max_score: float | None = None, exclude_risks: List[RiskFlag] = Query([]),
+                  session: AsyncSession = Depends(get_db)):
+    return await rank_candidates(position_id, session, sort_by, descending, limit, min_score, max_score,
+                                 exclude_risks)
+
+
+@router.get("/search", response_model=List[CandidateSearchResult])
+async def search(q: str = Query(..., min_length=2), position_id: UUID | None = None,
+                 limit: int = Query(20, ge=1, le=100), session: AsyncSession = Depends(get_db)):
+    return await search_candidates(q, session, limit, position_id)
 
 
 @router.get("/get/{candidate_id}", response_model=CandidateResponse)
@@ -26,8 +45,9 @@ async def get_by_id(candidate_id: UUID, session: AsyncSession = Depends(get_db))
 
 
 @router.get("/export/{candidate_id}")
-async def export(candidate_id: UUID, format: ExportFormat = Query(...), session: AsyncSession = Depends(get_db)):
-    return await export_candidate(candidate_id, format, session)
+async def export(candidate_id: UUID, format: ExportFormat = Query(...), if_none_match: str | None = Header(None),
+                 session: AsyncSession = Depends(get_db)):
+    return await export_candidate(candidate_id, format, session, if_none_match)
 
 
 @router.delete("/delete/{candidate_id}", status_code=status.HTTP_204_NO_CONTENT)
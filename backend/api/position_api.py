@@ -19,7 +19,7 @@ async def get_all(session: AsyncSession = Depends(get_db)):
 
 @router.get("/get/{position_id}", response_model=PositionResponse)
 async def get_by_id(position_id: UUID, session: AsyncSession = Depends(get_db)):
-    return await get_position_by_id(position_id, session)
+    return await get_position_by_id(position_id, session, with_candidates=True)
 
 
 @router.post("/create", response_model=PositionResponse)
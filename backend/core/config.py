@@ -23,6 +23,64 @@ class Settings(BaseSettings):
     MINIO_SECURE: bool
     CORS_ORIGINS: List[str]
     YOUCONTROL_API_KEY: str
+    OLLAMA_MAX_CONCURRENCY: int = 2
+    OLLAMA_MAX_QUEUE: int = 100
+    OLLAMA_QUEUE_TIMEOUT: float = 300.0
+    OLLAMA_REQUEST_TIMEOUT: float = 120.0
+    OLLAMA_MAX_KEEPALIVE: int = 10
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    OLLAMA_BACKENDS: List[str] = []
+    OLLAMA_HEALTH_INTERVAL: float = 10.0
+    OLLAMA_BACKOFF_BASE: float = 2.0
+    OLLAMA_BACKOFF_MAX: float = 60.0
+    JOB_WORKERS: int = 2
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_HEARTBEAT_INTERVAL: float = 10.0
+    JOB_LEASE_TTL: float = 60.0
+    JOB_MAX_ATTEMPTS: int = 3
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 512
+    LLM_CACHE_TTL: float = 30 * 24 * 60 * 60
+    PARSER_WORKERS: int = 2
+    PARSER_TIMEOUT: float = 60.0
+    PARSER_MEMORY_LIMIT_MB: int = 1024
+    INGEST_SPOOL_THRESHOLD: int = 1024 * 1024
+    MAX_FILE_SIZE: int = 50 * 1024 * 1024
+    BATCH_CONCURRENCY: int = 4
+    BATCH_INSERT_SIZE: int = 50
+    AI_CHARS_PER_TOKEN: float = 3.0
+    AI_DOCUMENT_TOKEN_BUDGET: int = 6000
+    AI_CHUNK_TOKENS: int = 2000
+    AI_CASCADE_ENABLED: bool = False
+    AI_SMALL_MODEL: str = ""
+    AI_CASCADE_UNCERTAIN_MIN: float = 3.0
+    AI_CASCADE_UNCERTAIN_MAX: float = 7.0
+    NAME_EXTRACTOR_MIN_CONFIDENCE: float = 0.7
+    YOUCONTROL_CACHE_TTL: float = 24 * 60 * 60
+    YOUCONTROL_CACHE_MAX_ENTRIES: int = 2048
+    YOUCONTROL_RATE_LIMIT: float = 5.0
+    YOUCONTROL_BURST: int = 10
+    YOUCONTROL_MAX_CONCURRENCY: int = 4
+    YOUCONTROL_MAX_RETRIES: int = 3
+    YOUCONTROL_BACKOFF_BASE: float = 0.5
+    YOUCONTROL_BACKOFF_MAX: float = 10.0
+    YOUCONTROL_BREAKER_THRESHOLD: int = 5
+    YOUCONTROL_BREAKER_COOLDOWN: float = 60.0
+    YOUCONTROL_TIMEOUT: float = 30.0
+    YOUCONTROL_MODE: str = "api"
+    YOUCONTROL_LOCAL_DIR: str = "data/sanctions"
+    YOUCONTROL_LOCAL_RELOAD_INTERVAL: float = 300.0
+    NAME_MATCH_THRESHOLD: float = 0.6
+    EMBEDDING_MODEL: str = ""
+    EMBEDDING_MAX_CHARS: int = 8000
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 4096
+    EMBEDDING_CACHE_TTL: float = 90 * 24 * 60 * 60
+    PRESCREEN_MIN_SIMILARITY: float = 0.0
+    OBJECT_LEASE_TTL: float = 3600.0
+    PURGE_INTERVAL: float = 3600.0
+    POSITION_PROMPT_CACHE_TTL: float = 60.0
+    POSITION_PROMPT_CACHE_MAX_ENTRIES: int = 256
 
     class Config:
         env_file = ".env"
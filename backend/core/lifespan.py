@@ -3,8 +3,17 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from core.config import settings
+from db.migrations import run_migrations
 from db.session import engine, Base
+from llm.router import llm_router
 from object_storage.minio_client import minio_client
+from services.document_parser import parser_pool
+from services.export_service import export_templates
+from services.job_service import job_worker_pool
+from services.purge_service import expired_row_purger
+from services.sanctions_index import sanctions_mirror
+from services.youcontrol_client import youcontrol_client
+from services.youcontrol_service import ENDPOINTS_CONFIG
 
 
 @asynccontextmanager
@@ -16,10 +25,26 @@ async def lifespan(app: FastAPI):
         print("Bucket already exists")
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await run_migrations(conn)
 
     print("Database connected, tables created")
 
+    export_templates.load()
+    parser_pool.start()
+    await llm_router.start()
+    await youcontrol_client.start()
+    if settings.YOUCONTROL_MODE == "local":
+        await sanctions_mirror.start(ENDPOINTS_CONFIG)
+    await job_worker_pool.start()
+    expired_row_purger.start()
+
     yield
 
+    await expired_row_purger.stop()
+    await job_worker_pool.stop()
+    await sanctions_mirror.stop()
+    await youcontrol_client.close()
+    await llm_router.close()
+    parser_pool.shutdown()
     await engine.dispose()
     print("Database disconnected")
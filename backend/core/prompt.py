@@ -110,8 +110,11 @@ basePrompt = """Твоє завдання — виступити в ролі д
 2. Використовуй подвійні лапки ("). Не використовуй переноси рядків всередині значень.
 """
 
-info_prompt = """Дані про кандидата: {full_text}
+position_prompt = """
 Дані про посаду: {position}
+"""
+
+info_prompt = """Дані про кандидата: {full_text}
 
 !!! УВАГА: ПРІОРИТЕТНЕ ЗАВДАННЯ ВІД КОРИСТУВАЧА !!!
 Користувач просить звернути особливу увагу на:
@@ -148,4 +151,17 @@ short_info_prompt = """
 }
 
 Текст для аналізу:
-"""
\ No newline at end of file
+"""
+
+chunk_summary_prompt = """
+Нижче наведено фрагмент документів кандидата. Стисло перекажи його українською мовою, зберігаючи всі факти,
+важливі для оцінки кандидата: ПІБ, дату народження, контакти, освіту, місця роботи з посадами та роками, навички,
+сертифікати, судові справи, декларації, санкції та будь-які ризики. Не вигадуй інформацію.
+
+Дай відповідь суворо у форматі JSON:
+{
+    "summary": ""
+}
+
+Фрагмент:
+"""
@@ -0,0 +1,6 @@
+import json
+
+
+def format_sse(event: str, data) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
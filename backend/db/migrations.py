@@ -0,0 +1,47 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from models.candidate_file import FILE_SEARCH_EXPRESSION
+from models.candidate_profile import SCORE_PATHS, score_expression, ranking_index_name, PROFILE_SEARCH_EXPRESSION
+
+# create_all only creates missing tables, so columns added to existing tables are listed here.
+# Every statement must be idempotent: they run on each startup.
+MIGRATIONS = [
+    "ALTER TABLE candidate_file ADD COLUMN IF NOT EXISTS extracted_text TEXT",
+    "ALTER TABLE candidate_file ADD COLUMN IF NOT EXISTS sha256 VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_candidate_file_sha256 ON candidate_file (sha256)",
+    "ALTER TABLE candidate_file ADD COLUMN IF NOT EXISTS object_name VARCHAR",
+    "CREATE INDEX IF NOT EXISTS ix_candidate_file_object_name ON candidate_file (object_name)",
+    "ALTER TABLE evaluation_job ADD COLUMN IF NOT EXISTS group_by VARCHAR",
+    "ALTER TABLE evaluation_job ADD COLUMN IF NOT EXISTS progress JSONB",
+    "ALTER TABLE evaluation_job ADD COLUMN IF NOT EXISTS claimed_by VARCHAR",
+    "ALTER TABLE evaluation_job ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE evaluation_job ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS ix_candidate_profile_position_id ON candidate_profile (position_id, id)",
+    # adding a stored generated column rewrites the table, which fills it in for existing profiles
+    *(f"ALTER TABLE candidate_profile ADD COLUMN IF NOT EXISTS {score} double precision "
+      f"GENERATED ALWAYS AS ({score_expression(*path)}) STORED" for score, path in SCORE_PATHS.items()),
+    *(f"CREATE INDEX IF NOT EXISTS {ranking_index_name(score)} "
+      f"ON candidate_profile (position_id, {score} DESC NULLS LAST, id)" for score in SCORE_PATHS),
+    "ALTER TABLE candidate_profile ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({PROFILE_SEARCH_EXPRESSION}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_candidate_profile_search_vector ON candidate_profile USING gin (search_vector)",
+    "ALTER TABLE candidate_file ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({FILE_SEARCH_EXPRESSION}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_candidate_file_search_vector ON candidate_file USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_candidate_file_candidate_id ON candidate_file (candidate_id)",
+    "ALTER TABLE candidate_profile ADD COLUMN IF NOT EXISTS evaluated_by JSONB",
+    # profiles saved before the column existed kept the marker inside the profile JSON
+    "UPDATE candidate_profile SET evaluated_by = profile -> 'evaluated_by', profile = profile - 'evaluated_by' "
+    "WHERE profile ? 'evaluated_by'",
+    "ALTER TABLE candidate_profile ADD COLUMN IF NOT EXISTS semantic_relevance double precision",
+    "UPDATE candidate_profile SET semantic_relevance = (profile ->> 'semantic_relevance')::double precision, "
+    "profile = profile - 'semantic_relevance' WHERE profile ? 'semantic_relevance'",
+    "CREATE INDEX IF NOT EXISTS ix_llm_cache_entry_created_at ON llm_cache_entry (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_embedding_entry_created_at ON embedding_entry (created_at)",
+]
+
+
+async def run_migrations(conn: AsyncConnection):
+    for statement in MIGRATIONS:
+        await conn.execute(text(statement))
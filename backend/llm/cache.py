@@ -0,0 +1,105 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from core.config import settings
+from db.session import asyncSession
+from models.llm_cache_entry import LLMCacheEntry
+from schemas.ai_schemas import RequestToAI
+
+
+class LLMCache:
+    """Content-addressed cache of model answers: in-process LRU in front of the llm_cache_entry table.
+
+    Requests are deterministic (temperature 0, fixed seed), so the answer only depends on the request body.
+    """
+
+    def __init__(self, max_entries: int, enabled: bool):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._memory_hits = 0
+        self._persistent_hits = 0
+        self._misses = 0
+        self._bypassed = 0
+        self._errors = 0
+
+    @staticmethod
+    def make_key(request: RequestToAI) -> str:
+        payload = request.model_dump(exclude={"stream", "keep_alive"})
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_named_key(namespace: str, *parts) -> str:
+        raw = ":".join([namespace, *(str(part) for part in parts)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def note_bypass(self):
+        self._bypassed += 1
+
+    async def get(self, key: str) -> str | None:
+        if not self.enabled:
+            return None
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._memory_hits += 1
+            return self._entries[key]
+
+        try:
+            async with asyncSession() as session:
+                entry = await session.get(LLMCacheEntry, key)
+        except Exception as e:
+            print(f"LLM cache read failed: {e!r}")
+            self._errors += 1
+            entry = None
+
+        if entry is None:
+            self._misses += 1
+            return None
+
+        self._persistent_hits += 1
+        self._remember(key, entry.response)
+        return entry.response
+
+    async def set(self, key: str, model: str, response: str):
+        if not self.enabled:
+            return
+
+        self._remember(key, response)
+        try:
+            async with asyncSession() as session:
+                await session.execute(
+                    insert(LLMCacheEntry)
+                    .values(key=key, model=model, response=response)
+                    .on_conflict_do_update(index_elements=[LLMCacheEntry.key],
+                                           set_={"response": response, "created_at": func.now()})
+                )
+                await session.commit()
+        except Exception as e:
+            print(f"LLM cache write failed: {e!r}")
+            self._errors += 1
+
+    def _remember(self, key: str, response: str):
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self._entries),
+            "memory_hits": self._memory_hits,
+            "persistent_hits": self._persistent_hits,
+            "misses": self._misses,
+            "bypassed": self._bypassed,
+            "errors": self._errors,
+        }
+
+
+llm_cache = LLMCache(max_entries=settings.LLM_CACHE_MAX_ENTRIES, enabled=settings.LLM_CACHE_ENABLED)
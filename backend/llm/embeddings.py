@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from typing import List
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from core.config import settings
+from db.session import asyncSession
+from llm.cache import LLMCache
+from llm.router import llm_router
+from models.embedding_entry import EmbeddingEntry
+
+
+def normalise(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class EmbeddingStore:
+    """Unit-length float32 embeddings keyed by content hash: in-process LRU in front of the embedding_entry table.
+
+    A text is only sent to Ollama's `/api/embed` once per model and truncation length; all missing texts of a call
+    go in batches.
+    """
+
+    def __init__(self, model: str, max_entries: int, batch_size: int, max_chars: int):
+        self.model = model
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.max_chars = max_chars
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._memory_hits = 0
+        self._persistent_hits = 0
+        self._computed = 0
+        self._errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.model)
+
+    def _key(self, content_hash: str) -> str:
+        # the vector is of the text cut to max_chars, so a different cut is a different entry
+        return LLMCache.make_named_key("embedding", self.model, self.max_chars, content_hash)
+
+    async def embed(self, items: List[tuple[str, str]]) -> np.ndarray:
+        """Embeddings of (content hash, text) items, one row per item."""
+        keys = [self._key(content_hash) for content_hash, _ in items]
+        vectors = {}
+        for key in keys:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                vectors[key] = self._entries[key]
+        self._memory_hits += len(vectors)
+
+        missing = {key: text for key, (_, text) in zip(keys, items) if key not in vectors}
+        if missing:
+            stored = await self._load(list(missing))
+            self._persistent_hits += len(stored)
+            vectors.update(stored)
+            computed = await self._compute({key: text for key, text in missing.items() if key not in stored})
+            vectors.update(computed)
+            for key, vector in {**stored, **computed}.items():
+                self._remember(key, vector)
+
+        return np.stack([vectors[key] for key in keys])
+
+    async def _load(self, keys: List[str]) -> dict[str, np.ndarray]:
+        try:
+            async with asyncSession() as session:
+                result = await session.execute(
+                    select(EmbeddingEntry.key, EmbeddingEntry.vector).where(EmbeddingEntry.key.in_(keys)))
+                return {key: np.frombuffer(vector, dtype="<f4") for key, vector in result.all()}
+        except Exception as e:
+            print(f"Embedding cache read failed: {e!r}")
+            self._errors += 1
+            return {}
+
+    async def _compute(self, texts: dict[str, str]) -> dict[str, np.ndarray]:
+        keys = list(texts)
+        computed = {}
+        for start in range(0, len(keys), self.batch_size):
+            batch = keys[start:start + self.batch_size]
+            embeddings = await llm_router.embed(self.model, [texts[key][:self.max_chars] for key in batch],
+                                                settings.OLLAMA_KEEP_ALIVE)
+            for key, vector in zip(batch, normalise(np.asarray(embeddings, dtype="<f4"))):
+                computed[key] = vector
+        self._computed += len(computed)
+        if computed:
+            await self._store(computed)
+        return computed
+
+    async def _store(self, vectors: dict[str, np.ndarray]):
+        try:
+            async with asyncSession() as session:
+                await session.execute(
+                    insert(EmbeddingEntry)
+                    .values([{"key": key, "model": self.model, "dimensions": len(vector), "vector": vector.tobytes()}
+                             for key, vector in vectors.items()])
+                    .on_conflict_do_nothing(index_elements=[EmbeddingEntry.key])
+                )
+                await session.commit()
+        except Exception as e:
+            print(f"Embedding cache write failed: {e!r}")
+            self._errors += 1
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def metrics(self) -> dict:
+        return {
+            "model": self.model,
+            "memory_entries": len(self._entries),
+            "memory_hits": self._memory_hits,
+            "persistent_hits": self._persistent_hits,
+            "computed": self._computed,
+            "errors": self._errors,
+        }
+
+
+embedding_store = EmbeddingStore(model=settings.EMBEDDING_MODEL,
+                                 max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+                                 batch_size=settings.EMBEDDING_BATCH_SIZE,
+                                 max_chars=settings.EMBEDDING_MAX_CHARS)
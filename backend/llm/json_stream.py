@@ -0,0 +1,56 @@
+import json
+from typing import Any, List, Tuple
+
+
+class JsonSectionParser:
+    """Incremental parser for a streamed JSON object: reports each top-level member as soon as it is complete."""
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self._text += chunk
+        sections = []
+
+        while self._pos < len(self._text):
+            char = self._text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = self._pos + 1
+            elif char in "}]":
+                if self._depth == 1:
+                    sections.extend(self._parse_member(self._pos))
+                self._depth -= 1
+            elif char == "," and self._depth == 1:
+                sections.extend(self._parse_member(self._pos))
+                self._member_start = self._pos + 1
+            self._pos += 1
+
+        return sections
+
+    def _parse_member(self, end: int) -> List[Tuple[str, Any]]:
+        member = self._text[self._member_start:end].strip()
+        if not member:
+            return []
+        try:
+            return list(json.loads("{" + member + "}").items())
+        except ValueError:
+            return []
+
+    def result(self) -> dict:
+        return json.loads(self._text)
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import time
+from typing import List
+
+import httpx
+from fastapi import HTTPException
+
+from schemas.ai_schemas import RequestToAI
+
+PROBE_TIMEOUT = 5.0
+
+
+class OllamaClient:
+    """Client for one Ollama node: a pooled httpx client plus a governor on in-flight requests."""
+
+    def __init__(self, base_url: str, max_concurrency: int, max_queue: int, queue_timeout: float,
+                 request_timeout: float, max_keepalive: int):
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self.max_keepalive = max_keepalive
+        self._client: httpx.AsyncClient | None = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._waiting = 0
+        self._max_waiting_seen = 0
+        self._total_requests = 0
+        self._rejected = 0
+        self._queue_timeouts = 0
+        self._errors = 0
+        self._wait_samples = 0
+        self._total_wait_seconds = 0.0
+        self._prompt_eval_tokens = 0
+        self._prompt_eval_seconds = 0.0
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.request_timeout),
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_keepalive),
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _acquire(self):
+        if self._waiting >= self.max_queue:
+            self._rejected += 1
+            raise HTTPException(status_code=503, detail="AI backend is busy, try again later")
+
+        self._waiting += 1
+        self._max_waiting_seen = max(self._max_waiting_seen, self._waiting)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._queue_timeouts += 1
+            raise HTTPException(status_code=503, detail="Timed out waiting for AI backend")
+        finally:
+            self._waiting -= 1
+            self._wait_samples += 1
+            self._total_wait_seconds += time.perf_counter() - started
+
+        self._in_flight += 1
+        self._total_requests += 1
+
+    @property
+    def outstanding(self) -> int:
+        return self._in_flight + self._waiting
+
+    @property
+    def accepts_requests(self) -> bool:
+        return self._waiting < self.max_queue
+
+    async def loaded_models(self) -> List[str]:
+        """Health probe: models currently held in memory by the node (`/api/ps`)."""
+        await self.start()
+        response = await self._client.get("/api/ps", timeout=PROBE_TIMEOUT)
+        response.raise_for_status()
+        return [model["name"] for model in response.json().get("models", [])]
+
+    def _record_usage(self, data: dict):
+        # prompt_eval_count only counts tokens Ollama had to evaluate; a reused KV-cache prefix is not included
+        self._prompt_eval_tokens += data.get("prompt_eval_count", 0)
+        self._prompt_eval_seconds += data.get("prompt_eval_duration", 0) / 1e9
+
+    def _release(self):
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    async def generate(self, request: RequestToAI) -> dict:
+        await self.start()
+        await self._acquire()
+        try:
+            response = await self._client.post("/api/generate", json=request.model_dump(exclude_none=True))
+            response.raise_for_status()
+            data = json.loads(response.text)
+            self._record_usage(data)
+            return data
+        except httpx.HTTPError:
+            self._errors += 1
+            raise
+        finally:
+            self._release()
+
+    async def embed(self, model: str, inputs: List[str], keep_alive: str | None = None) -> List[List[float]]:
+        await self.start()
+        await self._acquire()
+        try:
+            body = {"model": model, "input": inputs}
+            if keep_alive:
+                body["keep_alive"] = keep_alive
+            response = await self._client.post("/api/embed", json=body)
+            response.raise_for_status()
+            data = response.json()
+            self._record_usage(data)
+            return data["embeddings"]
+        except httpx.HTTPError:
+            self._errors += 1
+            raise
+        finally:
+            self._release()
+
+    async def stream_generate(self, request: RequestToAI):
+        await self.start()
+        await self._acquire()
+        try:
+            async with self._client.stream("POST", "/api/generate", json=request.model_dump(exclude_none=True)) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line:
+                        chunk = json.loads(line)
+                        if chunk.get("done"):
+                            self._record_usage(chunk)
+                        yield chunk
+        except httpx.HTTPError:
+            self._errors += 1
+            raise
+        finally:
+            self._release()
+
+    def metrics(self) -> dict:
+        return {
+            "url": self.base_url,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "max_queue_depth": self._max_waiting_seen,
+            "total_requests": self._total_requests,
+            "rejected": self._rejected,
+            "queue_timeouts": self._queue_timeouts,
+            "errors": self._errors,
+            "avg_wait_seconds": self._total_wait_seconds / self._wait_samples if self._wait_samples else 0.0,
+            "prompt_eval_tokens": self._prompt_eval_tokens,
+            "prompt_eval_seconds": self._prompt_eval_seconds,
+        }
+
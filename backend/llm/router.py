@@ -0,0 +1,167 @@
+import asyncio
+import time
+from typing import List
+
+import httpx
+from fastapi import HTTPException
+
+from core.config import settings
+from llm.ollama_client import OllamaClient
+from schemas.ai_schemas import RequestToAI
+
+
+class Backend:
+    def __init__(self, client: OllamaClient):
+        self.client = client
+        self.healthy = True
+        self.failures = 0
+        self.down_until = 0.0
+        self.loaded_models: List[str] = []
+
+    @property
+    def available(self) -> bool:
+        return self.healthy or time.monotonic() >= self.down_until
+
+    def mark_up(self, loaded_models: List[str] | None = None):
+        self.healthy = True
+        self.failures = 0
+        self.down_until = 0.0
+        if loaded_models is not None:
+            self.loaded_models = loaded_models
+
+    def note_model(self, model: str):
+        if model not in self.loaded_models:
+            self.loaded_models.append(model)
+
+    def mark_down(self, backoff_base: float, backoff_max: float):
+        self.healthy = False
+        self.failures += 1
+        self.down_until = time.monotonic() + min(backoff_base * 2 ** (self.failures - 1), backoff_max)
+
+
+def _is_backend_failure(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class OllamaRouter:
+    """Spreads Ollama requests over several nodes.
+
+    Each request goes to the available node with the fewest outstanding requests, preferring nodes that already
+    hold the model in memory. A node that fails (connection error or 5xx) is taken out for an exponential backoff
+    and the request is retried on another node; a background probe of `/api/ps` brings nodes back.
+    """
+
+    def __init__(self, urls: List[str], health_interval: float, backoff_base: float, backoff_max: float):
+        self.backends = [Backend(OllamaClient(base_url=url,
+                                              max_concurrency=settings.OLLAMA_MAX_CONCURRENCY,
+                                              max_queue=settings.OLLAMA_MAX_QUEUE,
+                                              queue_timeout=settings.OLLAMA_QUEUE_TIMEOUT,
+                                              request_timeout=settings.OLLAMA_REQUEST_TIMEOUT,
+                                              max_keepalive=settings.OLLAMA_MAX_KEEPALIVE))
+                         for url in urls]
+        self.health_interval = health_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._health_task: asyncio.Task | None = None
+        self._failovers = 0
+
+    async def start(self):
+        for backend in self.backends:
+            await backend.client.start()
+        if self._health_task is None:
+            await self.check_health()
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        for backend in self.backends:
+            await backend.client.close()
+
+    async def _probe(self, backend: Backend):
+        try:
+            backend.mark_up(await backend.client.loaded_models())
+        except (httpx.HTTPError, ValueError) as e:
+            if backend.healthy:
+                print(f"Ollama backend {backend.client.base_url} is down: {e!r}")
+            backend.mark_down(self.backoff_base, self.backoff_max)
+
+    async def check_health(self):
+        await asyncio.gather(*[self._probe(backend) for backend in self.backends])
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await self.check_health()
+
+    def _pick(self, model: str, tried: List[Backend]) -> Backend:
+        candidates = [backend for backend in self.backends
+                      if backend not in tried and backend.available and backend.client.accepts_requests]
+        if not candidates:
+            raise HTTPException(status_code=503, detail="No AI backend available")
+        return min(candidates, key=lambda backend: (backend.client.outstanding, model not in backend.loaded_models))
+
+    def _failed(self, backend: Backend, error: Exception):
+        print(f"Ollama backend {backend.client.base_url} failed: {error!r}")
+        backend.mark_down(self.backoff_base, self.backoff_max)
+        self._failovers += 1
+
+    async def _with_failover(self, model: str, call):
+        tried = []
+        while True:
+            backend = self._pick(model, tried)
+            tried.append(backend)
+            try:
+                data = await call(backend.client)
+            except httpx.HTTPError as e:
+                if not _is_backend_failure(e):
+                    raise
+                self._failed(backend, e)
+                continue
+            backend.mark_up()
+            backend.note_model(model)
+            return data
+
+    async def generate(self, request: RequestToAI) -> dict:
+        return await self._with_failover(request.model, lambda client: client.generate(request))
+
+    async def embed(self, model: str, inputs: List[str], keep_alive: str | None = None) -> List[List[float]]:
+        return await self._with_failover(model, lambda client: client.embed(model, inputs, keep_alive))
+
+    async def stream_generate(self, request: RequestToAI):
+        tried = []
+        while True:
+            backend = self._pick(request.model, tried)
+            tried.append(backend)
+            started = False
+            try:
+                async for chunk in backend.client.stream_generate(request):
+                    started = True
+                    yield chunk
+            except httpx.HTTPError as e:
+                # tokens already sent to the caller can't be taken back, so only a failure before the first
+                # chunk moves the request to another node
+                if started or not _is_backend_failure(e):
+                    raise
+                self._failed(backend, e)
+                continue
+            backend.mark_up()
+            backend.note_model(request.model)
+            return
+
+    def metrics(self) -> dict:
+        return {
+            "failovers": self._failovers,
+            "backends": [{**backend.client.metrics(), "healthy": backend.healthy, "failures": backend.failures,
+                          "loaded_models": backend.loaded_models} for backend in self.backends],
+        }
+
+
+llm_router = OllamaRouter(urls=settings.OLLAMA_BACKENDS or [settings.OLLAMA_API],
+                          health_interval=settings.OLLAMA_HEALTH_INTERVAL,
+                          backoff_base=settings.OLLAMA_BACKOFF_BASE,
+                          backoff_max=settings.OLLAMA_BACKOFF_MAX)
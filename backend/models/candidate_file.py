@@ -1,9 +1,15 @@
 from uuid import uuid4
 
-from sqlalchemy import Column, UUID, String, Integer, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, UUID, String, Integer, ForeignKey, Text, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 
 from db.session import Base
+from models.candidate_profile import SEARCH_CONFIG
+
+# to_tsvector fails on documents whose vector would exceed 1 MB, so very long texts are indexed by their beginning
+SEARCH_TEXT_LIMIT = 200000
+FILE_SEARCH_EXPRESSION = f"to_tsvector('{SEARCH_CONFIG}', left(coalesce(extracted_text, ''), {SEARCH_TEXT_LIMIT}))"
 
 
 class CandidateFile(Base):
@@ -12,5 +18,14 @@ class CandidateFile(Base):
     file_name = Column(String)
     content_type = Column(String)
     file_size = Column(Integer)
-    candidate_id = Column(UUID(as_uuid=True), ForeignKey('candidate_profile.id', ondelete="CASCADE"), nullable=True)
-    candidate = relationship("CandidateProfile", back_populates="files")
\ No newline at end of file
+    sha256 = Column(String(64), nullable=True, index=True)
+    object_name = Column(String, nullable=True, index=True)
+    extracted_text = deferred(Column(Text, nullable=True))
+    search_vector = deferred(Column(TSVECTOR, Computed(FILE_SEARCH_EXPRESSION, persisted=True)))
+    candidate_id = Column(UUID(as_uuid=True), ForeignKey('candidate_profile.id', ondelete="CASCADE"), nullable=True,
+                          index=True)
+    candidate = relationship("CandidateProfile", back_populates="files")
+
+    __table_args__ = (
+        Index("ix_candidate_file_search_vector", "search_vector", postgresql_using="gin"),
+    )
@@ -1,23 +1,71 @@
 from uuid import uuid4
 
-from sqlalchemy import Column, UUID, ForeignKey
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, UUID, ForeignKey, Float, Computed, Index, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 
 from db.session import Base
 
+# generated column -> path of the score in the profile JSON
+SCORE_PATHS = {
+    "overall_score": ("position_relevance", "overall_score"),
+    "trust_score": ("evaluation", "trust_score"),
+    "integrity_score": ("evaluation", "integrity_score"),
+    "leadership_maturity_score": ("evaluation", "leadership_maturity_score"),
+    "overall_profile_index": ("evaluation", "overall_profile_index"),
+    "relevance_to_position_score": ("evaluation", "relevance_to_position_score"),
+}
+
+# Postgres ships no Ukrainian stemmer. The russian configuration stems Cyrillic words with the Russian Snowball
+# stemmer, which strips most Ukrainian inflection endings as well, and ASCII words with the English one.
+SEARCH_CONFIG = "russian"
+# every string value of the profile: names, companies, positions, certifications, conclusions
+PROFILE_SEARCH_EXPRESSION = f"jsonb_to_tsvector('{SEARCH_CONFIG}', profile, '[\"string\"]')"
+
+
+def score_expression(section: str, key: str) -> str:
+    # scores the model wrote as anything but a JSON number (e.g. "" or "7/10") become NULL
+    path = f"'{{{section},{key}}}'"
+    return f"CASE WHEN jsonb_typeof(profile #> {path}) = 'number' THEN (profile #>> {path})::double precision END"
+
+
+def _score_column(name: str):
+    return Column(name, Float, Computed(score_expression(*SCORE_PATHS[name]), persisted=True))
+
+
+def ranking_index_name(score: str) -> str:
+    return f"ix_candidate_profile_rank_{score}"
+
 
 class CandidateProfile(Base):
     __tablename__ = 'candidate_profile'
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     profile = Column(JSONB, nullable=False)
+    # {"model", "escalated"}: which model produced the profile; kept out of `profile` so it is not exported or indexed
+    evaluated_by = Column(JSONB, nullable=True)
+    # embedding similarity of the candidate's files to the position, see services.semantic_service
+    semantic_relevance = Column(Float, nullable=True)
     position_id = Column(UUID(as_uuid=True), ForeignKey('position.id', ondelete="SET NULL"), nullable=True)
     position = relationship("Position", back_populates="candidates")
     files = relationship("CandidateFile", back_populates="candidate", cascade="all, delete-orphan",lazy="selectin")
 
+    overall_score = _score_column("overall_score")
+    trust_score = _score_column("trust_score")
+    integrity_score = _score_column("integrity_score")
+    leadership_maturity_score = _score_column("leadership_maturity_score")
+    overall_profile_index = _score_column("overall_profile_index")
+    relevance_to_position_score = _score_column("relevance_to_position_score")
+    search_vector = deferred(Column(TSVECTOR, Computed(PROFILE_SEARCH_EXPRESSION, persisted=True)))
+
+    __table_args__ = (
+        *(Index(ranking_index_name(score), "position_id", text(f"{score} DESC NULLS LAST"), "id")
+          for score in SCORE_PATHS),
+        Index("ix_candidate_profile_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
     @property
     def name(self) -> str:
         try:
             return self.profile.get("candidate", {}).get("full_name", "Unknown")
         except (AttributeError, TypeError):
-            return "Unknown"
\ No newline at end of file
+            return "Unknown"
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Integer, LargeBinary, DateTime, func
+
+from db.session import Base
+
+
+class EmbeddingEntry(Base):
+    __tablename__ = 'embedding_entry'
+    key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    dimensions = Column(Integer, nullable=False)
+    # unit-length float32 vector, little-endian
+    vector = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,26 @@
+from uuid import uuid4
+
+from sqlalchemy import Column, UUID, String, Boolean, Integer, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from db.session import Base
+
+
+class EvaluationJob(Base):
+    __tablename__ = 'evaluation_job'
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, index=True)
+    prompt = Column(String, nullable=True)
+    websearch = Column(Boolean, nullable=False, default=False)
+    position_id = Column(UUID(as_uuid=True), nullable=True)
+    candidate_id = Column(UUID(as_uuid=True), nullable=True)
+    files = Column(JSONB, nullable=False, default=list)
+    group_by = Column(String, nullable=True)
+    progress = Column(JSONB, nullable=True)
+    error = Column(String, nullable=True)
+    claimed_by = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
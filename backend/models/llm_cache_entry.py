@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Text, DateTime, func
+
+from db.session import Base
+
+
+class LLMCacheEntry(Base):
+    __tablename__ = 'llm_cache_entry'
+    key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
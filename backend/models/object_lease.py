@@ -0,0 +1,11 @@
+from sqlalchemy import Column, UUID, String, DateTime, func
+
+from db.session import Base
+
+
+class ObjectLease(Base):
+    """Marks a MinIO object as in use by an uploaded file whose candidate is not saved yet."""
+    __tablename__ = 'object_lease'
+    file_id = Column(UUID(as_uuid=True), primary_key=True)
+    object_name = Column(String, nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -12,4 +12,5 @@ class Position(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     name = Column(String)
     parameters = Column(JSONB, nullable=False)
-    candidates = relationship("CandidateProfile", back_populates="position", lazy="selectin")
\ No newline at end of file
+    candidates = relationship("CandidateProfile", back_populates="position", lazy="raise",
+                              passive_deletes=True)
\ No newline at end of file
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from db.session import Base
+
+
+class YouControlCacheEntry(Base):
+    __tablename__ = 'youcontrol_cache_entry'
+    key = Column(String(64), primary_key=True)
+    endpoint = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -1,7 +1,9 @@
-from typing import Any
+from typing import Any, List
 
 from pydantic import BaseModel
 
+from schemas.file_schemas import FileError
+
 
 class RequestToAI(BaseModel):
     model: str
@@ -9,6 +11,19 @@ class RequestToAI(BaseModel):
     stream: bool
     format: str
     options: dict[str, Any]
+    system: str | None = None
+    keep_alive: str | None = None
 
 class RefreshRequest(BaseModel):
-    prompt: str
\ No newline at end of file
+    prompt: str
+
+
+class PrescreenResult(BaseModel):
+    file_name: str
+    similarity: float
+    passes: bool
+
+
+class PrescreenResponse(BaseModel):
+    results: List[PrescreenResult]
+    error_files: List[FileError] = []
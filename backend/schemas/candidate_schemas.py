@@ -1,3 +1,4 @@
+from enum import Enum
 from typing import List
 from uuid import UUID
 
@@ -12,6 +13,8 @@ class CandidateBase(BaseModel):
 
 class CandidateResponse(CandidateBase):
     profile: dict
+    evaluated_by: dict | None = None
+    semantic_relevance: float | None = None
     position_id: UUID | None = None
     files: List[FileResponse] = []
     error_files: List[FileError] = []
@@ -20,6 +23,53 @@ class CandidateResponse(CandidateBase):
 class CandidateList(CandidateBase):
     name: str
 
+
+class CandidateListItem(CandidateList):
+    position_id: UUID | None = None
+    overall_score: float | None = None
+    trust_score: float | None = None
+    integrity_score: float | None = None
+
+
+class CandidatePage(BaseModel):
+    items: List[CandidateListItem]
+    next_cursor: UUID | None = None
+
+
+class CandidateScore(str, Enum):
+    OVERALL_SCORE = "overall_score"
+    TRUST_SCORE = "trust_score"
+    INTEGRITY_SCORE = "integrity_score"
+    LEADERSHIP_MATURITY_SCORE = "leadership_maturity_score"
+    OVERALL_PROFILE_INDEX = "overall_profile_index"
+    RELEVANCE_TO_POSITION_SCORE = "relevance_to_position_score"
+
+
+class RiskFlag(str, Enum):
+    CONFLICT_OF_INTEREST = "conflict_of_interest"
+    FREQUENT_JOB_CHANGES = "frequent_job_changes"
+    DISCIPLINARY_ISSUES = "disciplinary_issues"
+    COMPETENCY_MISMATCH = "competency_mismatch"
+
+
+class SearchHighlight(BaseModel):
+    source: str
+    text: str
+
+
+class CandidateSearchResult(CandidateList):
+    position_id: UUID | None = None
+    rank: float
+    highlights: List[SearchHighlight] = []
+
+
+class CandidateRanking(CandidateListItem):
+    rank: int
+    leadership_maturity_score: float | None = None
+    overall_profile_index: float | None = None
+    relevance_to_position_score: float | None = None
+    risk_analysis: dict | None = None
+
 class ShortCandidateInfo(BaseModel):
     LastName: str
     FirstName: str
@@ -0,0 +1,38 @@
+from datetime import datetime
+from enum import Enum
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+
+class JobKind(str, Enum):
+    GENERATE = "generate"
+    REFRESH = "refresh"
+    BATCH = "batch"
+
+
+class BatchGroupBy(str, Enum):
+    FILE = "file"
+    PREFIX = "prefix"
+    FOLDER = "folder"
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobResponse(BaseModel):
+    id: UUID
+    kind: JobKind
+    status: JobStatus
+    position_id: UUID | None = None
+    candidate_id: UUID | None = None
+    error: str | None = None
+    progress: dict | None = None
+    attempts: int = 0
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    model_config = ConfigDict(from_attributes=True)
@@ -11,6 +11,10 @@ class PositionCreate(BaseModel):
     parameters: List[dict]
 
 
+class PositionPrompt(PositionCreate):
+    model_config = ConfigDict(from_attributes=True)
+
+
 class PositionResponse(PositionCreate):
     id: UUID
     candidates: List[CandidateList]
@@ -6,3 +6,5 @@ class CheckResult(BaseModel):
     match_found: bool
     details_count: int
     raw_data: list
+    # False when the source could not be checked (throttled, down or partially answered)
+    available: bool = True
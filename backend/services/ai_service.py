@@ -1,5 +1,8 @@
 import json
-from typing import List
+import math
+import time
+from asyncio import gather, create_task
+from typing import List, Awaitable
 from uuid import UUID
 
 import httpx
@@ -7,95 +10,430 @@ from fastapi import UploadFile, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
-from core.prompt import basePrompt, info_prompt, short_info_prompt
+from core.prompt import basePrompt, info_prompt, position_prompt, short_info_prompt, chunk_summary_prompt
+from core.sse import format_sse
+from llm.cache import llm_cache
+from llm.embeddings import embedding_store
+from llm.json_stream import JsonSectionParser
+from llm.router import llm_router
 from schemas.ai_schemas import RequestToAI
 from schemas.candidate_schemas import CandidateResponse, ShortCandidateInfo
-from schemas.position_schemas import PositionResponse
 from services.candidate_service import get_candidate_by_id, create_candidate, update_candidate_profile
-from services.file_service import read_files, read_files_from_minio
-from services.minio_service import upload_files
-from services.position_service import get_position_by_id
+from services.file_service import read_files, read_files_from_minio, discard_files
+from services.minio_service import upload_files, discard_uploaded_files
+from services.name_extractor import extract_candidate_info
+from services.position_service import get_position_prompt
+from services.semantic_service import semantic_relevance
 from services.youcontrol_service import check_candidate
 
+MAX_SUMMARY_ROUNDS = 3
+
 
 async def generate_answer(prompt: str, position_id: UUID, files: List[UploadFile], websearch: bool,
-                          session: AsyncSession):
-    full_text, processed_files, error_files = await read_files(files)
+                          session: AsyncSession, use_cache: bool = True):
+    profile_data, evaluation_info, candidate_files, error_files = await evaluate_files(prompt, position_id, files,
+                                                                                       websearch, session, use_cache)
+    try:
+        new_candidate = await create_candidate(profile_data, candidate_files, position_id, session, evaluation_info)
+    except Exception:
+        await session.rollback()
+        await discard_uploaded_files(candidate_files)
+        raise
 
-    additional_info = ""
-    if websearch:
-        additional_info = do_websearch(full_text)
+    return CandidateResponse(id=new_candidate.id, profile=new_candidate.profile,
+                             evaluated_by=new_candidate.evaluated_by,
+                             semantic_relevance=new_candidate.semantic_relevance,
+                             position_id=new_candidate.position_id, files=new_candidate.files,
+                             error_files=error_files)
 
-    profile_data = await make_request(full_text, position_id, prompt, additional_info, session)
-    if profile_data["candidate"]["full_name"] == "unknown":
-        raise HTTPException(status_code=422, detail="No candidate data")
-    candidate_files, upload_error_files = await upload_files(processed_files)
+
+async def _timed(timings: dict, stage: str, coro):
+    started = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[stage] = time.perf_counter() - started
+
+
+async def _analyse_text(full_text: str, documents: List[tuple[str | None, str]], websearch: bool, use_cache: bool,
+                        timings: dict | None = None):
+    """Summarises the documents and runs the web search on the original text at the same time."""
+    timings = {} if timings is None else timings
+    condense_task = create_task(_timed(timings, "condense", condense_documents(full_text, documents, use_cache)))
+    websearch_task = create_task(_timed(timings, "websearch",
+                                        _collect_additional_info(full_text, websearch, use_cache)))
+    try:
+        condensed_text, additional_info = await gather(condense_task, websearch_task)
+    except BaseException:
+        condense_task.cancel()
+        websearch_task.cancel()
+        await gather(condense_task, websearch_task, return_exceptions=True)
+        raise
+    return condensed_text, additional_info
+
+
+async def evaluate_files(prompt: str, position_id: UUID, files: List[UploadFile], websearch: bool,
+                         session: AsyncSession, use_cache: bool = True):
+    """Runs the evaluation as a small DAG: once the files are parsed, the MinIO upload, the position lookup and the
+    summarisation/web search run concurrently, and the LLM call waits only for the last two. If the profile is
+    rejected or a stage fails, the uploaded objects are removed again.
+
+    Returns the profile, the `CandidateProfile` column values describing the evaluation, the uploaded files and
+    the files that could not be read or stored."""
+    timings = {}
+    started = time.perf_counter()
+    full_text, processed_files, error_files = await _timed(timings, "parse", read_files(files, session))
+    upload_task = None
+    try:
+        if not processed_files:
+            raise HTTPException(status_code=422, detail="No readable files")
+
+        upload_task = create_task(_timed(timings, "upload", upload_files(processed_files)))
+        # the session is only used by this task until the LLM stage
+        position_task = create_task(_timed(timings, "position", get_position_prompt(position_id, session)))
+        analysis_task = create_task(_analyse_text(full_text, [(file.sha256, file.text) for file in processed_files],
+                                                  websearch, use_cache, timings))
+        prescreen_task = create_task(_timed(timings, "prescreen", _prescreen(position_task, processed_files)))
+        try:
+            await gather(position_task, analysis_task, prescreen_task)
+        except BaseException:
+            analysis_task.cancel()
+            prescreen_task.cancel()
+            await gather(position_task, analysis_task, prescreen_task, return_exceptions=True)
+            raise
+        full_text, additional_info = analysis_task.result()
+
+        profile_data, evaluation_info = await _timed(timings, "evaluate", make_request(
+            full_text, position_id, prompt, additional_info, session, use_cache))
+        _mark_relevance(evaluation_info, prescreen_task.result())
+        if profile_data["candidate"]["full_name"] == "unknown":
+            raise HTTPException(status_code=422, detail="No candidate data")
+        candidate_files, upload_error_files = await upload_task
+    except BaseException:
+        if upload_task is not None:
+            await _compensate_upload(upload_task)
+        raise
+    finally:
+        discard_files(processed_files)
+        print("Evaluation timings: " + ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in timings.items())
+              + f", total={time.perf_counter() - started:.2f}s")
     error_files.extend(upload_error_files)
-    new_candidate = await create_candidate(profile_data, candidate_files, position_id, session)
+    return profile_data, evaluation_info, candidate_files, error_files
+
+
+async def _prescreen(position_prompt: Awaitable[str], processed_files) -> float | None:
+    """Semantic similarity of the candidate's files to the position, from embeddings. Below
+    PRESCREEN_MIN_SIMILARITY the candidate is rejected before the LLM evaluation."""
+    position_prompt = await position_prompt
+    if not embedding_store.enabled:
+        return None
+    relevance = await semantic_relevance(position_prompt, processed_files)
+    if relevance is not None and relevance < settings.PRESCREEN_MIN_SIMILARITY:
+        raise HTTPException(status_code=422,
+                            detail=f"Candidate does not match the position (semantic similarity {relevance:.2f})")
+    return relevance
+
+
+def _mark_relevance(evaluation_info: dict, relevance: float | None):
+    if relevance is not None:
+        evaluation_info["semantic_relevance"] = round(relevance, 4)
+
 
-    return CandidateResponse(id=new_candidate.id, profile=new_candidate.profile, position_id=new_candidate.position_id,
-                             files=new_candidate.files, error_files=error_files)
+async def _compensate_upload(upload_task):
+    # the upload reads the spooled files, so it has to finish before they are discarded
+    try:
+        candidate_files, _ = await upload_task
+    except Exception:
+        return
+    await discard_uploaded_files(candidate_files)
 
 
-async def refresh_candidate(candidate_id: UUID, prompt: str, websearch: bool, session: AsyncSession):
+async def refresh_candidate(candidate_id: UUID, prompt: str, websearch: bool, session: AsyncSession,
+                            use_cache: bool = True):
     candidate = await get_candidate_by_id(candidate_id, session)
     files = candidate.files
-    full_text, processed_files, error_files = await read_files_from_minio(files)
+    full_text, processed_files, error_files = await read_files_from_minio(files, session)
+    full_text, additional_info = await _analyse_text(
+        full_text, [(file.sha256, file.extracted_text) for file in processed_files], websearch, use_cache)
 
-    additional_info = ""
-    if websearch:
-        additional_info = do_websearch(full_text)
-
-    profile_data = await make_request(full_text, candidate.position_id, prompt, additional_info, session)
-    updated_candidate = await update_candidate_profile(candidate_id, profile_data, session)
+    profile_data, evaluation_info = await make_request(full_text, candidate.position_id, prompt, additional_info,
+                                                       session, use_cache)
+    updated_candidate = await update_candidate_profile(candidate_id, profile_data, session, evaluation_info)
     return CandidateResponse(id=updated_candidate.id, profile=updated_candidate.profile,
+                             evaluated_by=updated_candidate.evaluated_by,
+                             semantic_relevance=updated_candidate.semantic_relevance,
                              position_id=updated_candidate.position_id,
                              files=updated_candidate.files, error_files=error_files)
 
 
-async def make_request(full_text: str, position_id: UUID, prompt: str, additional_info, session: AsyncSession):
-    position_orm = await get_position_by_id(position_id, session)
-    position = PositionResponse.model_validate(position_orm).model_dump_json()
-    final_prompt = basePrompt + info_prompt.format(full_text=full_text, position=position, prompt=prompt,
-                                                   additional_info=additional_info)
+async def generate_answer_stream(prompt: str, position_id: UUID, files: List[UploadFile], websearch: bool,
+                                 session: AsyncSession, use_cache: bool = True):
+    processed_files = []
+    try:
+        yield format_sse("status", {"stage": "reading_files"})
+        full_text, processed_files, error_files = await read_files(files, session)
+        if not processed_files:
+            raise HTTPException(status_code=422, detail="No readable files")
+        if embedding_store.enabled:
+            yield format_sse("status", {"stage": "prescreening"})
+        relevance = await _prescreen(get_position_prompt(position_id, session), processed_files)
 
-    async with httpx.AsyncClient(timeout=httpx.Timeout(120)) as client:
-        request = RequestToAI(model=settings.AI_MODEL, prompt=final_prompt, stream=False,
-                              format="json",
-                              options={"temperature": 0.0, "seed": 137})
-        response = await client.post(
-            f"{settings.OLLAMA_API}/api/generate",
-            json=request.model_dump()
-        )
+        if estimate_tokens(full_text) > settings.AI_DOCUMENT_TOKEN_BUDGET:
+            yield format_sse("status", {"stage": "summarising"})
+        if websearch:
+            yield format_sse("status", {"stage": "websearch"})
+        full_text, additional_info = await _analyse_text(
+            full_text, [(file.sha256, file.text) for file in processed_files], websearch, use_cache)
 
-        data = json.loads(response.text)
-        answer = data["response"]
-        return json.loads(answer)
+        final_prompt = await _build_evaluation_prompt(full_text, position_id, prompt, additional_info, session)
+        yield format_sse("status", {"stage": "evaluating"})
 
+        # same cascade as make_request: a decisive small-model profile is sent as sections, without tokens
+        cascade = settings.AI_CASCADE_ENABLED and bool(settings.AI_SMALL_MODEL)
+        profile_data = await _preliminary_profile(final_prompt, use_cache) if cascade else None
+        request = _evaluation_request(final_prompt, stream=True)
+        if profile_data is not None:
+            evaluation_info = _decided_by(settings.AI_SMALL_MODEL, escalated=False)
+        else:
+            if cascade:
+                yield format_sse("status", {"stage": "escalating"})
+            evaluation_info = _decided_by(request.model, escalated=cascade)
+            cache_key = llm_cache.make_key(request)
+            cached = await _cached_answer(cache_key, use_cache)
+            if cached is not None:
+                profile_data = json.loads(cached)
+        if profile_data is not None:
+            for name, value in profile_data.items():
+                yield format_sse("section", {"name": name, "value": value})
+        else:
+            parser = JsonSectionParser()
+            async for chunk in llm_router.stream_generate(request):
+                token = chunk.get("response", "")
+                if token:
+                    yield format_sse("token", {"text": token})
+                    for name, value in parser.feed(token):
+                        yield format_sse("section", {"name": name, "value": value})
+                if chunk.get("done"):
+                    break
 
-async def get_short_candidate_info(full_text: str):
-    final_prompt = short_info_prompt + full_text
-    async with httpx.AsyncClient(timeout=httpx.Timeout(120)) as client:
-        request = RequestToAI(model=settings.AI_MODEL, prompt=final_prompt, stream=False, format="json",
-                              options={"temperature": 0.0, "seed": 137})
-        response = await client.post(
-            f"{settings.OLLAMA_API}/api/generate",
-            json=request.model_dump()
-        )
-        data = json.loads(response.text)
-        answer = data["response"]
-        answer = json.loads(answer)
-        print(answer)
-        candidate_info = ShortCandidateInfo(**answer)
-
-        if not candidate_info.LastName:
+            try:
+                profile_data = parser.result()
+            except ValueError:
+                raise HTTPException(status_code=502, detail="AI returned invalid JSON")
+            await llm_cache.set(cache_key, request.model, json.dumps(profile_data, ensure_ascii=False))
+        if profile_data["candidate"]["full_name"] == "unknown":
             raise HTTPException(status_code=422, detail="No candidate data")
+        _mark_relevance(evaluation_info, relevance)
+
+        yield format_sse("status", {"stage": "saving"})
+        candidate_files, upload_error_files = await upload_files(processed_files)
+        error_files.extend(upload_error_files)
+        try:
+            new_candidate = await create_candidate(profile_data, candidate_files, position_id, session,
+                                                   evaluation_info)
+        except Exception:
+            await session.rollback()
+            await discard_uploaded_files(candidate_files)
+            raise
+
+        response = CandidateResponse(id=new_candidate.id, profile=new_candidate.profile,
+                                     evaluated_by=new_candidate.evaluated_by,
+                                     semantic_relevance=new_candidate.semantic_relevance,
+                                     position_id=new_candidate.position_id, files=new_candidate.files,
+                                     error_files=error_files)
+        yield format_sse("result", response.model_dump(mode="json"))
+    except HTTPException as e:
+        yield format_sse("error", {"status_code": e.status_code, "detail": e.detail})
+    except httpx.HTTPError:
+        yield format_sse("error", {"status_code": 502, "detail": "AI backend is unavailable"})
+    finally:
+        discard_files(processed_files)
+
+
+async def make_request(full_text: str, position_id: UUID, prompt: str, additional_info, session: AsyncSession,
+                       use_cache: bool = True):
+    final_prompt = await _build_evaluation_prompt(full_text, position_id, prompt, additional_info, session)
+
+    cascade = settings.AI_CASCADE_ENABLED and bool(settings.AI_SMALL_MODEL)
+    if cascade:
+        preliminary = await _preliminary_profile(final_prompt, use_cache)
+        if preliminary is not None:
+            return preliminary, _decided_by(settings.AI_SMALL_MODEL, escalated=False)
+
+    profile_data = await _generate(_evaluation_request(final_prompt, stream=False), use_cache)
+    return profile_data, _decided_by(settings.AI_MODEL, escalated=cascade)
+
+
+async def _preliminary_profile(final_prompt: tuple[str, str], use_cache: bool) -> dict | None:
+    """The small model's profile when it is final, None when the candidate has to be escalated to AI_MODEL."""
+    try:
+        preliminary = await _generate(_evaluation_request(final_prompt, stream=False, model=settings.AI_SMALL_MODEL),
+                                      use_cache)
+    except (ValueError, httpx.HTTPError) as e:
+        print(f"Small model failed, escalating: {e!r}")
+        return None
+    return None if _needs_escalation(preliminary) else preliminary
+
+
+def _score(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _needs_escalation(profile_data: dict) -> bool:
+    """A preliminary profile is final only when its verdict is outside the uncertain band and no risk is flagged."""
+    try:
+        if profile_data["candidate"]["full_name"] == "unknown":
+            return True
+        score = _score(profile_data["position_relevance"]["overall_score"])
+        risks = profile_data.get("risk_analysis") or {}
+    except (KeyError, TypeError):
+        return True
+
+    if score is None or settings.AI_CASCADE_UNCERTAIN_MIN <= score <= settings.AI_CASCADE_UNCERTAIN_MAX:
+        return True
+    return any(value is True for value in risks.values())
+
 
+def _decided_by(model: str, escalated: bool) -> dict:
+    return {"evaluated_by": {"model": model, "escalated": escalated}}
+
+
+async def _generate(request: RequestToAI, use_cache: bool = True) -> dict:
+    cache_key = llm_cache.make_key(request)
+    cached = await _cached_answer(cache_key, use_cache)
+    if cached is not None:
+        return json.loads(cached)
+
+    data = await llm_router.generate(request)
+    answer = data["response"]
+    parsed = json.loads(answer)
+    await llm_cache.set(cache_key, request.model, answer)
+    return parsed
+
+
+async def _cached_answer(cache_key: str, use_cache: bool):
+    if not use_cache:
+        llm_cache.note_bypass()
+        return None
+    return await llm_cache.get(cache_key)
+
+
+async def _build_evaluation_prompt(full_text: str, position_id: UUID, prompt: str, additional_info,
+                                   session: AsyncSession):
+    """Returns (system, prompt). The system part only depends on the position, so Ollama can reuse its KV cache
+    for every candidate evaluated against the same position."""
+    position = await get_position_prompt(position_id, session)
+    system = basePrompt + position_prompt.format(position=position)
+    return system, info_prompt.format(full_text=full_text, prompt=prompt, additional_info=additional_info)
+
+
+def _evaluation_request(final_prompt: tuple[str, str], stream: bool, model: str | None = None):
+    system, prompt = final_prompt
+    return RequestToAI(model=model or settings.AI_MODEL, system=system, prompt=prompt, stream=stream,
+                       format="json",
+                       options={"temperature": 0.0, "seed": 137},
+                       keep_alive=settings.OLLAMA_KEEP_ALIVE)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / settings.AI_CHARS_PER_TOKEN)
+
+
+def _split_into_chunks(text: str, chunk_tokens: int) -> List[str]:
+    chunk_chars = max(1, int(chunk_tokens * settings.AI_CHARS_PER_TOKEN))
+    chunks = []
+    current = ""
+    for paragraph in text.split("\n"):
+        while len(paragraph) > chunk_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:chunk_chars])
+            paragraph = paragraph[chunk_chars:]
+        if current and len(current) + len(paragraph) + 1 > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _summarise_chunk(chunk: str, use_cache: bool) -> str:
+    request = RequestToAI(model=settings.AI_MODEL, prompt=chunk_summary_prompt + chunk, stream=False, format="json",
+                          options={"temperature": 0.0, "seed": 137})
+    answer = await _generate(request, use_cache)
+    return str(answer.get("summary", ""))
+
+
+async def _condense_document(sha256: str | None, text: str, token_budget: int, use_cache: bool) -> str:
+    if estimate_tokens(text) <= token_budget:
+        return text
+
+    cache_key = None
+    if sha256:
+        cache_key = llm_cache.make_named_key("summary", settings.AI_MODEL, sha256, token_budget,
+                                             settings.AI_CHUNK_TOKENS)
+        cached = await _cached_answer(cache_key, use_cache)
+        if cached is not None:
+            return cached
+
+    summary = text
+    for _ in range(MAX_SUMMARY_ROUNDS):
+        chunks = _split_into_chunks(summary, settings.AI_CHUNK_TOKENS)
+        summaries = await gather(*[_summarise_chunk(chunk, use_cache) for chunk in chunks])
+        summary = "\n".join(summaries)
+        if estimate_tokens(summary) <= token_budget:
+            break
+    # the model did not condense enough, keep the prompt bounded anyway
+    summary = summary[:int(token_budget * settings.AI_CHARS_PER_TOKEN)]
+
+    if cache_key is not None:
+        await llm_cache.set(cache_key, settings.AI_MODEL, summary)
+    return summary
+
+
+async def condense_documents(full_text: str, documents: List[tuple[str | None, str]], use_cache: bool = True):
+    """Map-reduce stage: when the candidate text does not fit AI_DOCUMENT_TOKEN_BUDGET, oversized documents are
+    split into chunks, summarised in parallel and the summaries replace the original text."""
+    if not documents or estimate_tokens(full_text) <= settings.AI_DOCUMENT_TOKEN_BUDGET:
+        return full_text
+
+    token_budget = max(1, settings.AI_DOCUMENT_TOKEN_BUDGET // len(documents))
+    condensed = await gather(*[_condense_document(sha256, text or "", token_budget, use_cache)
+                               for sha256, text in documents])
+    return "".join(f"{i}: {text}\n" for i, text in enumerate(condensed))
+
+
+async def get_short_candidate_info(full_text: str, use_cache: bool = True):
+    candidate_info, confidence = extract_candidate_info(full_text)
+    if candidate_info is not None and confidence >= settings.NAME_EXTRACTOR_MIN_CONFIDENCE:
         return candidate_info
 
+    final_prompt = short_info_prompt + full_text
+    request = RequestToAI(model=settings.AI_MODEL, prompt=final_prompt, stream=False, format="json",
+                          options={"temperature": 0.0, "seed": 137})
+    answer = await _generate(request, use_cache)
+    print(answer)
+    candidate_info = ShortCandidateInfo(**answer)
+
+    if not candidate_info.LastName:
+        raise HTTPException(status_code=422, detail="No candidate data")
+
+    return candidate_info
+
+
+async def _collect_additional_info(full_text: str, websearch: bool, use_cache: bool = True):
+    if not websearch:
+        return ""
+    return await do_websearch(full_text, use_cache)
+
 
-async def do_websearch(full_text: str):
-    candidate_info = await get_short_candidate_info(full_text)
+async def do_websearch(full_text: str, use_cache: bool = True):
+    candidate_info = await get_short_candidate_info(full_text, use_cache)
     youcontrol_info = await check_candidate(candidate_info.LastName, candidate_info.FirstName,
                                             candidate_info.MiddleName, candidate_info.BirthDate)
-    return json.dumps(youcontrol_info)
+    return json.dumps([result.model_dump() for result in youcontrol_info], ensure_ascii=False)
@@ -0,0 +1,223 @@
+import asyncio
+import os
+import posixpath
+import tempfile
+import time
+import zipfile
+from asyncio import to_thread
+from collections import OrderedDict
+from io import BytesIO
+from typing import List
+
+from fastapi import UploadFile, HTTPException
+from sqlalchemy import update
+from starlette.datastructures import Headers
+
+from core.config import settings
+from db.session import asyncSession
+from models.candidate_profile import CandidateProfile
+from models.evaluation_job import EvaluationJob
+from object_storage.minio_client import minio_client
+from schemas.job_schemas import BatchGroupBy
+from services.ai_service import evaluate_files
+from services.minio_service import discard_uploaded_files, release_file_leases
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+GROUP_SEPARATORS = ("_", "-", " ", ".")
+PROGRESS_FLUSH_INTERVAL = 2.0
+
+
+def _is_zip(staged: dict):
+    return staged.get("content_type") in ZIP_CONTENT_TYPES or staged["file_name"].lower().endswith(".zip")
+
+
+def _is_junk_member(name: str):
+    base = os.path.basename(name)
+    return name.endswith("/") or name.startswith("__MACOSX/") or not base or base.startswith(".")
+
+
+def _group_key(path: str, group_by: BatchGroupBy):
+    match group_by:
+        case BatchGroupBy.FOLDER:
+            # the immediate parent, so "export/alice/cv.pdf" and "export/bob/cv.pdf" stay two candidates
+            return posixpath.dirname(path) or path
+        case BatchGroupBy.PREFIX:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            for i, char in enumerate(stem):
+                if char in GROUP_SEPARATORS and i > 0:
+                    return stem[:i].lower()
+            return stem.lower()
+        case _:
+            return path
+
+
+def _download_archive(object_name: str):
+    handle, path = tempfile.mkstemp(prefix="iudicium-batch-", suffix=".zip")
+    os.close(handle)
+    minio_client.fget_object(settings.MINIO_BUCKET, object_name, path)
+    return path
+
+
+def _list_archive(path: str):
+    with zipfile.ZipFile(path) as archive:
+        return [(info.filename, info.file_size) for info in archive.infolist() if not _is_junk_member(info.filename)]
+
+
+def _read_archive_member(path: str, member: str):
+    with zipfile.ZipFile(path) as archive:
+        return archive.read(member)
+
+
+def _read_object(object_name: str):
+    response = minio_client.get_object(settings.MINIO_BUCKET, object_name)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+async def _collect_entries(staged_files: List[dict], archives: List[str]):
+    entries = []
+    for staged in staged_files:
+        if not _is_zip(staged):
+            entries.append({"path": staged["file_name"], "object_name": staged["object_name"],
+                            "content_type": staged.get("content_type"), "size": staged.get("file_size") or 0})
+            continue
+
+        archive_path = await to_thread(_download_archive, staged["object_name"])
+        archives.append(archive_path)
+        for member, size in await to_thread(_list_archive, archive_path):
+            entries.append({"path": member, "archive": archive_path, "member": member, "size": size})
+    return entries
+
+
+def group_entries(entries: List[dict], group_by: BatchGroupBy):
+    groups = OrderedDict()
+    for entry in entries:
+        groups.setdefault(_group_key(entry["path"], group_by), []).append(entry)
+    return list(groups.items())
+
+
+async def _load_entry(entry: dict) -> UploadFile:
+    if "archive" in entry:
+        content = await to_thread(_read_archive_member, entry["archive"], entry["member"])
+        headers = None
+    else:
+        content = await to_thread(_read_object, entry["object_name"])
+        headers = Headers({"content-type": entry["content_type"]}) if entry.get("content_type") else None
+    return UploadFile(file=BytesIO(content), filename=os.path.basename(entry["path"]), size=len(content),
+                      headers=headers)
+
+
+async def _save_progress(job_id, progress: dict):
+    async with asyncSession() as session:
+        await session.execute(update(EvaluationJob).where(EvaluationJob.id == job_id).values(progress=progress))
+        await session.commit()
+
+
+async def run_batch(job: EvaluationJob):
+    """Evaluates every candidate of a batch job through a bounded worker pool and bulk-inserts the profiles.
+
+    A failed candidate is recorded in `progress["failures"]` and does not stop the batch. Saved candidates are
+    listed in `progress["completed"]`, so a batch resumed after a restart skips them.
+    """
+    archives = []
+    try:
+        entries = await _collect_entries(job.files, archives)
+        all_groups = group_entries(entries, BatchGroupBy(job.group_by or BatchGroupBy.FILE.value))
+        completed = (job.progress or {}).get("completed", [])
+        completed_names = set(completed)
+        groups = [group for group in all_groups if group[0] not in completed_names]
+        progress = {"total": len(all_groups), "done": len(completed), "failed": 0, "failures": [],
+                    "completed": completed}
+        await _save_progress(job.id, progress)
+
+        concurrency = max(1, settings.BATCH_CONCURRENCY)
+        pending_groups = asyncio.Queue(maxsize=concurrency * 2)
+        results = asyncio.Queue(maxsize=settings.BATCH_INSERT_SIZE * 2)
+
+        async def produce():
+            for group in groups:
+                await pending_groups.put(group)
+            for _ in range(concurrency):
+                await pending_groups.put(None)
+
+        async def evaluate():
+            while (group := await pending_groups.get()) is not None:
+                name, group_files = group
+                # checked before anything is read: a ZIP member is decompressed into memory in one piece
+                oversized = [entry["path"] for entry in group_files if entry["size"] > settings.MAX_FILE_SIZE]
+                if oversized:
+                    await results.put({"group": name, "reason": "File is too large: " + ", ".join(oversized)})
+                    continue
+                files = []
+                try:
+                    # a session per candidate: no transaction stays open across the batch, and a DB error
+                    # only fails this candidate
+                    async with asyncSession() as session:
+                        files = [await _load_entry(entry) for entry in group_files]
+                        profile_data, evaluation_info, candidate_files, _ = await evaluate_files(
+                            job.prompt, job.position_id, files, job.websearch, session)
+                    profile = CandidateProfile(profile=profile_data, files=candidate_files,
+                                               position_id=job.position_id, **evaluation_info)
+                    await results.put({"group": name, "profile": profile})
+                except HTTPException as e:
+                    await results.put({"group": name, "reason": str(e.detail)})
+                except Exception as e:
+                    print(f"Batch {job.id}: candidate {name} failed: {e!r}")
+                    await results.put({"group": name, "reason": "Evaluation failed"})
+                finally:
+                    for file in files:
+                        await file.close()
+
+        async def write():
+            pending = []
+            last_flush = time.monotonic()
+
+            async with asyncSession() as session:
+                async def flush():
+                    nonlocal pending, last_flush
+                    if pending:
+                        try:
+                            session.add_all([item["profile"] for item in pending])
+                            await session.commit()
+                            await release_file_leases([file for item in pending for file in item["profile"].files])
+                            progress["done"] += len(pending)
+                            progress["completed"].extend(item["group"] for item in pending)
+                        except Exception as e:
+                            await session.rollback()
+                            print(f"Batch {job.id}: bulk insert failed: {e!r}")
+                            await discard_uploaded_files([file for item in pending for file in item["profile"].files])
+                            progress["failed"] += len(pending)
+                            progress["failures"].extend(
+                                {"group": item["group"], "reason": "Can't save candidate"} for item in pending)
+                        pending = []
+                    await _save_progress(job.id, progress)
+                    last_flush = time.monotonic()
+
+                for _ in range(len(groups)):
+                    item = await results.get()
+                    if "profile" in item:
+                        pending.append(item)
+                    else:
+                        progress["failed"] += 1
+                        progress["failures"].append(item)
+
+                    if (len(pending) >= settings.BATCH_INSERT_SIZE
+                            or time.monotonic() - last_flush >= PROGRESS_FLUSH_INTERVAL):
+                        await flush()
+                await flush()
+
+        async with asyncio.TaskGroup() as tasks:
+            tasks.create_task(produce())
+            tasks.create_task(write())
+            for _ in range(concurrency):
+                tasks.create_task(evaluate())
+        return progress
+    finally:
+        for path in archives:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
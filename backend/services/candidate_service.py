@@ -1,21 +1,163 @@
-from asyncio import to_thread, gather
 from typing import List
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, func, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.datastructures import UploadFile
 
-from core.config import settings
-from models.candidate_profile import CandidateProfile
-from object_storage.minio_client import minio_client
-from services.file_service import get_file_extension_minio
-
-
-async def get_all_candidates(session: AsyncSession):
-    result = await session.execute(select(CandidateProfile))
-    return result.scalars().all()
+from models.candidate_file import CandidateFile, SEARCH_TEXT_LIMIT
+from models.candidate_profile import CandidateProfile, SEARCH_CONFIG
+from schemas.candidate_schemas import CandidateScore, RiskFlag
+from services.minio_service import remove_unreferenced_files, remove_candidate_exports, release_file_leases
+
+
+async def get_all_candidates(session: AsyncSession, limit: int, after: UUID | None = None,
+                             position_id: UUID | None = None, min_score: float | None = None,
+                             max_score: float | None = None):
+    """One page of candidates ordered by id, starting after the `after` cursor.
+
+    Only the name is read from the profile; the scores come from their generated columns, so neither the whole
+    JSONB document nor the files are loaded.
+    """
+    query = select(
+        CandidateProfile.id,
+        CandidateProfile.position_id,
+        func.coalesce(CandidateProfile.profile["candidate"]["full_name"].astext, "Unknown").label("name"),
+        CandidateProfile.overall_score,
+        CandidateProfile.trust_score,
+        CandidateProfile.integrity_score,
+    ).order_by(CandidateProfile.id).limit(limit + 1)
+
+    if after is not None:
+        query = query.where(CandidateProfile.id > after)
+    if position_id is not None:
+        query = query.where(CandidateProfile.position_id == position_id)
+    if min_score is not None:
+        query = query.where(CandidateProfile.overall_score >= min_score)
+    if max_score is not None:
+        query = query.where(CandidateProfile.overall_score <= max_score)
+
+    rows = (await session.execute(query)).mappings().all()
+    items = rows[:limit]
+    next_cursor = items[-1]["id"] if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+async def rank_candidates(position_id: UUID, session: AsyncSession, sort_by: CandidateScore, descending: bool,
+                          limit: int, min_score: float | None = None, max_score: float | None = None,
+                          exclude_risks: List[RiskFlag] = ()):
+    """Top `limit` candidates of a position by `sort_by`, read from the position's ranking index.
+
+    Candidates without that score are not ranked.
+    """
+    score = getattr(CandidateProfile, sort_by.value)
+    query = select(
+        CandidateProfile.id,
+        CandidateProfile.position_id,
+        func.coalesce(CandidateProfile.profile["candidate"]["full_name"].astext, "Unknown").label("name"),
+        *(getattr(CandidateProfile, column.value) for column in CandidateScore),
+        CandidateProfile.profile["risk_analysis"].label("risk_analysis"),
+    ).where(CandidateProfile.position_id == position_id, score.is_not(None))
+
+    if min_score is not None:
+        query = query.where(score >= min_score)
+    if max_score is not None:
+        query = query.where(score <= max_score)
+    for flag in exclude_risks:
+        query = query.where(~CandidateProfile.profile.contains({"risk_analysis": {flag.value: True}}))
+
+    # exactly the order of the index (or its reverse), so the planner reads the top rows off it without sorting
+    if descending:
+        query = query.order_by(score.desc().nulls_last(), CandidateProfile.id)
+    else:
+        query = query.order_by(score.asc().nulls_first(), CandidateProfile.id.desc())
+
+    rows = (await session.execute(query.limit(limit))).mappings().all()
+    return [{**row, "rank": rank} for rank, row in enumerate(rows, start=1)]
+
+
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=20, MinWords=5, StartSel=<b>, StopSel=</b>"
+# a match in the profile counts more than the same match in a CV
+FILE_RANK_WEIGHT = 0.5
+
+
+def _highlighted_strings(value):
+    """String values of a ts_headline'd profile that contain a match."""
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, list):
+        return [text for item in value for text in _highlighted_strings(item)]
+    return [value] if isinstance(value, str) and "<b>" in value else []
+
+
+async def search_candidates(query_text: str, session: AsyncSession, limit: int, position_id: UUID | None = None):
+    """Candidates whose profile or CV text matches `query_text` (web search syntax: "quoted phrases", or, -not),
+    best first, with the matching fragments highlighted.
+
+    Both sources are looked up in their GIN-indexed `search_vector` columns; only the returned page is highlighted.
+    """
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, query_text)
+
+    profile_hits = select(
+        CandidateProfile.id.label("candidate_id"),
+        func.ts_rank(CandidateProfile.search_vector, query).label("rank"),
+    ).where(CandidateProfile.search_vector.bool_op("@@")(query))
+    file_hits = select(
+        CandidateFile.candidate_id,
+        (func.ts_rank(CandidateFile.search_vector, query) * FILE_RANK_WEIGHT).label("rank"),
+    ).where(CandidateFile.search_vector.bool_op("@@")(query), CandidateFile.candidate_id.is_not(None))
+    if position_id is not None:
+        profile_hits = profile_hits.where(CandidateProfile.position_id == position_id)
+        file_hits = file_hits.join(CandidateProfile, CandidateProfile.id == CandidateFile.candidate_id) \
+            .where(CandidateProfile.position_id == position_id)
+
+    hits = union_all(profile_hits, file_hits).subquery()
+    ranked = (
+        select(hits.c.candidate_id, func.sum(hits.c.rank).label("rank"))
+        .group_by(hits.c.candidate_id)
+        .order_by(func.sum(hits.c.rank).desc(), hits.c.candidate_id)
+        .limit(limit)
+        .subquery()
+    )
+    rows = (await session.execute(
+        select(
+            CandidateProfile.id,
+            CandidateProfile.position_id,
+            func.coalesce(CandidateProfile.profile["candidate"]["full_name"].astext, "Unknown").label("name"),
+            ranked.c.rank,
+            func.ts_headline(SEARCH_CONFIG, CandidateProfile.profile, query, HEADLINE_OPTIONS).label("headline"),
+        )
+        .join(ranked, ranked.c.candidate_id == CandidateProfile.id)
+        .order_by(ranked.c.rank.desc(), CandidateProfile.id)
+    )).mappings().all()
+    if not rows:
+        return []
+
+    file_headlines = (await session.execute(
+        select(
+            CandidateFile.candidate_id,
+            CandidateFile.file_name,
+            func.ts_headline(SEARCH_CONFIG, func.left(CandidateFile.extracted_text, SEARCH_TEXT_LIMIT), query,
+                             HEADLINE_OPTIONS).label("headline"),
+        ).where(CandidateFile.candidate_id.in_([row["id"] for row in rows]),
+                CandidateFile.search_vector.bool_op("@@")(query))
+    )).all()
+    highlights = {}
+    for candidate_id, file_name, headline in file_headlines:
+        highlights.setdefault(candidate_id, []).append({"source": file_name, "text": headline})
+
+    return [
+        {
+            "id": row["id"],
+            "position_id": row["position_id"],
+            "name": row["name"],
+            "rank": row["rank"],
+            "highlights": [{"source": "profile", "text": text} for text in _highlighted_strings(row["headline"])]
+                          + highlights.get(row["id"], []),
+        }
+        for row in rows
+    ]
 
 
 async def get_candidate_by_id(candidate_id: UUID, session: AsyncSession):
@@ -27,34 +169,35 @@ async def get_candidate_by_id(candidate_id: UUID, session: AsyncSession):
     return candidate
 
 
-async def create_candidate(profile_data, candidate_files: List[UploadFile], position_id: UUID, session: AsyncSession):
-    profile = CandidateProfile(profile=profile_data, files=candidate_files, position_id=position_id)
+async def create_candidate(profile_data, candidate_files: List[UploadFile], position_id: UUID, session: AsyncSession,
+                           evaluation_info: dict | None = None):
+    profile = CandidateProfile(profile=profile_data, files=candidate_files, position_id=position_id,
+                               **(evaluation_info or {}))
     session.add(profile)
     await session.commit()
+    await release_file_leases(candidate_files)
     await session.refresh(profile)
     return profile
 
 
-async def update_candidate_profile(candidate_id: UUID, profile_data, session: AsyncSession):
+async def update_candidate_profile(candidate_id: UUID, profile_data, session: AsyncSession,
+                                   evaluation_info: dict | None = None):
     candidate = await get_candidate_by_id(candidate_id, session)
     candidate.profile = profile_data
+    for column, value in (evaluation_info or {}).items():
+        setattr(candidate, column, value)
     session.add(candidate)
     await session.commit()
     await session.refresh(candidate)
+    await remove_candidate_exports(candidate_id)
     return candidate
 
 async def delete_candidate_by_id(candidate_id: UUID, session: AsyncSession):
     candidate = await get_candidate_by_id(candidate_id, session)
-
-    minio_tasks = []
-
-    for file in candidate.files:
-        ext = get_file_extension_minio(file)
-        task = to_thread(minio_client.remove_object, settings.MINIO_BUCKET, str(file.id) + ext)
-        minio_tasks.append(task)
-
-    if minio_tasks:
-        await gather(*minio_tasks, return_exceptions=True)
+    files = list(candidate.files)
 
     await session.delete(candidate)
     await session.commit()
+
+    await remove_unreferenced_files(files)
+    await remove_candidate_exports(candidate_id)
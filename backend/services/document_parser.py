@@ -0,0 +1,129 @@
+import asyncio
+import json
+import multiprocessing
+import resource
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+import fitz
+from docx import Document
+
+from core.config import settings
+
+# Extra time the event loop waits past the in-worker alarm before it kills the worker.
+HARD_TIMEOUT_GRACE = 5.0
+
+
+class ParseTimeoutError(Exception):
+    pass
+
+
+def _init_worker(memory_limit_mb: int):
+    if memory_limit_mb > 0:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _raise_timeout(signum, frame):
+    raise ParseTimeoutError()
+
+
+def _parse_document(source: bytes | str, content_type: str):
+    # source is either the file content or a path to a spooled upload
+    match content_type:
+        case "application/pdf":
+            doc = fitz.open(stream=source, filetype="pdf") if isinstance(source, bytes) else fitz.open(source)
+            return "\n".join(page.get_text() for page in doc)
+        case "application/json":
+            if isinstance(source, str):
+                with open(source, "rb") as f:
+                    source = f.read()
+            return json.loads(source)
+        case "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+            doc = Document(BytesIO(source) if isinstance(source, bytes) else source)
+            return "\n".join(p.text for p in doc.paragraphs)
+        case _:
+            raise ValueError(f"Unsupported file type: {content_type}")
+
+
+def parse_in_worker(source: bytes | str, content_type: str, timeout: float):
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return _parse_document(source, content_type)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class ParserPool:
+    """Runs document parsing in worker processes so PyMuPDF/python-docx never block the event loop.
+
+    Every worker is its own single-process executor, so a worker that does not return within the grace period
+    after its in-worker alarm (`timeout`) is killed and replaced without touching parses running in the others.
+    Workers start from a forkserver that only imports this module: a forked worker would inherit the app's whole
+    address space, which `memory_limit_mb` (RLIMIT_AS) would then mostly spend before parsing anything.
+    """
+
+    def __init__(self, workers: int, timeout: float, memory_limit_mb: int):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._context = multiprocessing.get_context("forkserver")
+        self._context.set_forkserver_preload([__name__])
+        self._executors: list[ProcessPoolExecutor] = []
+        self._idle: asyncio.Queue[ProcessPoolExecutor] | None = None
+
+    def start(self):
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for _ in range(self.workers):
+                executor = self._new_executor()
+                self._executors.append(executor)
+                self._idle.put_nowait(executor)
+
+    def shutdown(self):
+        for executor in self._executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._executors = []
+        self._idle = None
+
+    async def parse(self, source: bytes | str, content_type: str):
+        self.start()
+        executor = await self._idle.get()
+        loop = asyncio.get_running_loop()
+        broken = False
+        try:
+            future = loop.run_in_executor(executor, parse_in_worker, source, content_type, self.timeout)
+            return await asyncio.wait_for(future, timeout=self.timeout + HARD_TIMEOUT_GRACE)
+        except asyncio.TimeoutError:
+            print(f"Parser worker did not finish in {self.timeout + HARD_TIMEOUT_GRACE}s, replacing it")
+            broken = True
+            raise ParseTimeoutError()
+        except BrokenProcessPool:
+            broken = True
+            raise
+        finally:
+            self._release(executor, broken)
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=1, mp_context=self._context, initializer=_init_worker,
+                                   initargs=(self.memory_limit_mb,))
+
+    def _release(self, executor: ProcessPoolExecutor, broken: bool):
+        if executor not in self._executors:
+            return  # the pool was shut down while this parse ran
+        if broken:
+            # ProcessPoolExecutor can't cancel a running task, so the stuck worker process is killed directly.
+            for process in list(executor._processes.values()):
+                process.kill()
+            executor.shutdown(wait=False, cancel_futures=True)
+            replacement = self._new_executor()
+            self._executors[self._executors.index(executor)] = replacement
+            executor = replacement
+        self._idle.put_nowait(executor)
+
+
+parser_pool = ParserPool(workers=settings.PARSER_WORKERS, timeout=settings.PARSER_TIMEOUT,
+                         memory_limit_mb=settings.PARSER_MEMORY_LIMIT_MB)
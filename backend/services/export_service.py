@@ -1,5 +1,7 @@
 import csv
+import hashlib
 import json
+from asyncio import to_thread
 from io import BytesIO, StringIO
 from urllib.parse import quote
 from uuid import UUID
@@ -8,29 +10,90 @@ from docxtpl import DocxTemplate
 from fastapi import HTTPException
 from jinja2 import Template
 from sqlalchemy.ext.asyncio import AsyncSession
-from starlette.responses import StreamingResponse
+from starlette.responses import StreamingResponse, Response
 from weasyprint import HTML
 
 from models.candidate_profile import CandidateProfile
 from schemas.candidate_schemas import CandidateResponse
 from schemas.export_format import ExportFormat
 from services.candidate_service import get_candidate_by_id
+from services.minio_service import export_object_name, get_cached_export, put_cached_export, iter_object
 
+PDF_TEMPLATE_PATH = "template/candidate_template_pdf.html"
+DOCX_TEMPLATE_PATH = "template/candidate_template_docx.docx"
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+# browsers may keep an export but have to revalidate it with If-None-Match
+CACHE_CONTROL = "private, no-cache"
 
-async def export_candidate(candidate_id: UUID, format: ExportFormat, session: AsyncSession):
+
+class ExportTemplates:
+    """Export templates, read and compiled once. `version` is a hash of the template files, so changing a template
+    makes every cached export stale."""
+
+    def __init__(self):
+        self.pdf: Template | None = None
+        self.docx: bytes | None = None
+        self.version = ""
+
+    def load(self):
+        with open(PDF_TEMPLATE_PATH, "rb") as f:
+            html = f.read()
+        with open(DOCX_TEMPLATE_PATH, "rb") as f:
+            docx = f.read()
+        self.pdf = Template(html.decode("utf-8"))
+        # docxtpl renders into the document object, so every render starts from these bytes
+        self.docx = docx
+        self.version = hashlib.sha256(html + docx).hexdigest()[:16]
+
+    def ensure_loaded(self):
+        if self.pdf is None:
+            self.load()
+
+
+export_templates = ExportTemplates()
+
+
+async def export_candidate(candidate_id: UUID, format: ExportFormat, session: AsyncSession,
+                           if_none_match: str | None = None):
     candidate = await get_candidate_by_id(candidate_id, session)
+    export_templates.ensure_loaded()
+    digest = _export_digest(candidate, format)
+    etag = f'"{digest}"'
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
     match format:
         case ExportFormat.JSON:
-            return _export_json(candidate)
+            response = _export_json(candidate)
         case ExportFormat.CSV:
-            return _export_csv(candidate)
-        case ExportFormat.DOCX:
-            return _export_docx(candidate)
-        case ExportFormat.PDF:
-            return _export_pdf(candidate)
+            response = _export_csv(candidate)
+        case ExportFormat.DOCX | ExportFormat.PDF:
+            response = await _export_rendered(candidate, format, digest)
         case _:
             raise HTTPException(status_code=404, detail="Invalid export format")
 
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def _export_digest(candidate: CandidateProfile, format: ExportFormat) -> str:
+    # DOCX/PDF only render the profile; JSON/CSV are built from the whole CandidateResponse, so they are keyed on it
+    # and change when a file is uploaded or deleted
+    if format in (ExportFormat.DOCX, ExportFormat.PDF):
+        content = candidate.profile
+    else:
+        content = CandidateResponse.model_validate(candidate).model_dump(mode="json")
+    raw = json.dumps(content, sort_keys=True, ensure_ascii=False) + export_templates.version + format.value
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
 
 def _export_json(candidate: CandidateProfile):
     candidate_response = CandidateResponse.model_validate(candidate)
@@ -66,42 +129,41 @@ def _export_csv(candidate: CandidateProfile):
     return _create_file_response(file_stream, filename, content_type)
 
 
-def _export_docx(candidate: CandidateProfile):
-    candidate = CandidateResponse.model_validate(candidate).model_dump()
+async def _export_rendered(candidate: CandidateProfile, format: ExportFormat, digest: str):
+    """DOCX/PDF export. A rendered document is kept in MinIO under the export digest, so repeat downloads of an
+    unchanged profile are streamed from there instead of being rendered again."""
+    render, extension, content_type = RENDERERS[format]
+    context = _prepare_full_context(CandidateResponse.model_validate(candidate).model_dump())
+    filename = f"{context['candidate']['full_name'].replace(' ', '_')}{extension}"
+    object_name = export_object_name(candidate.id, digest, extension)
+
+    cached = await get_cached_export(object_name)
+    if cached is not None:
+        return _create_file_response(iter_object(cached), filename, content_type)
 
-    context = _prepare_full_context(candidate)
+    content = await to_thread(render, context)
+    await put_cached_export(object_name, content, content_type)
+    return _create_file_response(BytesIO(content), filename, content_type)
 
-    template_path = "template/candidate_template_docx.docx"
-    doc = DocxTemplate(template_path)
 
+def _render_docx(context: dict) -> bytes:
+    doc = DocxTemplate(BytesIO(export_templates.docx))
     doc.render(context)
 
     file_stream = BytesIO()
     doc.save(file_stream)
-
-    filename = f"{context["candidate"]["full_name"].replace(' ', '_')}.docx"
-    content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-
-    return _create_file_response(file_stream, filename, content_type)
+    return file_stream.getvalue()
 
 
-def _export_pdf(candidate: CandidateProfile):
-    candidate = CandidateResponse.model_validate(candidate).model_dump()
-    context = _prepare_full_context(candidate)
-
-    with open("template/candidate_template_pdf.html", "r", encoding="utf-8") as f:
-        template_content = f.read()
-
-    template = Template(template_content)
-    html_rendered = template.render(context)
+def _render_pdf(context: dict) -> bytes:
+    html_rendered = export_templates.pdf.render(context)
+    return HTML(string=html_rendered).write_pdf()
 
-    file_stream = BytesIO()
-    HTML(string=html_rendered).write_pdf(file_stream)
-
-    filename = f"{context["candidate"]["full_name"].replace(' ', '_')}.pdf"
-    content_type = "application/pdf"
 
-    return _create_file_response(file_stream, filename, content_type)
+RENDERERS = {
+    ExportFormat.DOCX: (_render_docx, ".docx", DOCX_CONTENT_TYPE),
+    ExportFormat.PDF: (_render_pdf, ".pdf", "application/pdf"),
+}
 
 
 def _flatten_json_for_csv(data: dict, parent_key: str = '', sep: str = '_') -> dict:
@@ -200,8 +262,7 @@ def _prepare_full_context(candidate_data: dict) -> dict:
     return context
 
 
-def _create_file_response(file_stream: BytesIO, filename: str, media_type: str) -> StreamingResponse:
-    file_stream.seek(0)
+def _create_file_response(content, filename: str, media_type: str) -> StreamingResponse:
     filename_encoded = quote(filename)
-    return StreamingResponse(file_stream, media_type=media_type,
+    return StreamingResponse(content, media_type=media_type,
                              headers={"Content-Disposition": f"attachment; filename*=utf-8''{filename_encoded}"})
@@ -1,18 +1,22 @@
-import json
+import hashlib
 import os
-from asyncio import to_thread
+import tempfile
+from asyncio import to_thread, gather
+from dataclasses import dataclass
 from io import BytesIO
-from typing import List
+from typing import List, BinaryIO
 
-import fitz
 import magic
-from docx import Document
 from fastapi import UploadFile, HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 from core.config import settings
 from models.candidate_file import CandidateFile
 from object_storage.minio_client import minio_client
 from schemas.file_schemas import FileError
+from services.document_parser import parser_pool
 
 ALLOWED_BINARY_TYPES = {
     "application/pdf": ".pdf",
@@ -22,25 +26,95 @@ ALLOWED_BINARY_TYPES = {
 
 ALLOWED_TEXT_EXTENSIONS = {".txt", ".csv", ".mermaid", ".mmd", ".md", ".json"}
 
+SNIFF_SIZE = 2048
+INGEST_CHUNK_SIZE = 64 * 1024
 
-async def _process_file(content: bytes, filename: str, content_type = None):
+
+@dataclass
+class IngestedFile:
+    file_name: str
+    content_type: str
+    extension: str
+    sha256: str
+    size: int
+    content: bytes | None = None
+    path: str | None = None
+    text: str | None = None
+
+    @property
+    def source(self) -> bytes | str:
+        return self.content if self.path is None else self.path
+
+    def open(self) -> BinaryIO:
+        return BytesIO(self.content) if self.path is None else open(self.path, "rb")
+
+    def discard(self):
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+
+async def ingest_upload(file: UploadFile) -> IngestedFile:
+    """Reads an upload once: sniffs the type from the first bytes, hashes while streaming and spools large files to disk."""
+    await file.seek(0)
+    head = await file.read(SNIFF_SIZE)
+    content_type = _get_real_mime_type(head, file.filename)
+    extension = _get_extension(content_type, file.filename)
+
+    digest = hashlib.sha256(head)
+    buffer = BytesIO()
+    buffer.write(head)
+    spool_file = None
+    size = len(head)
+    try:
+        while chunk := await file.read(INGEST_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+            if size > settings.MAX_FILE_SIZE:
+                raise HTTPException(status_code=413, detail="File is too large")
+            if spool_file is None and size > settings.INGEST_SPOOL_THRESHOLD:
+                spool_file = tempfile.NamedTemporaryFile(prefix="iudicium-", suffix=extension, delete=False)
+                spool_file.write(buffer.getvalue())
+                buffer = None
+            if spool_file is not None:
+                spool_file.write(chunk)
+            else:
+                buffer.write(chunk)
+    except Exception:
+        if spool_file is not None:
+            spool_file.close()
+            os.remove(spool_file.name)
+        raise
+
+    if spool_file is not None:
+        spool_file.close()
+        return IngestedFile(file_name=file.filename, content_type=content_type, extension=extension,
+                            sha256=digest.hexdigest(), size=size, path=spool_file.name)
+
+    return IngestedFile(file_name=file.filename, content_type=content_type, extension=extension,
+                        sha256=digest.hexdigest(), size=size, content=buffer.getvalue())
+
+
+def discard_files(files: List[IngestedFile]):
+    for file in files:
+        file.discard()
+
+
+async def _process_file(source: bytes | str, filename: str, content_type = None):
     if content_type is None:
-        content_type = _get_real_mime_type(content, filename)
+        content_type = _get_real_mime_type(source, filename)
     match content_type:
         case _ if content_type.startswith("text/"):
-            text = content.decode("utf-8")
-            return text
-        case "application/pdf":
-            doc = fitz.open(stream=content, filetype="pdf")
-            text = "\n".join(page.get_text() for page in doc)
-            return text
-        case "application/json":
-            text = json.loads(content)
-            return text
-        case "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            doc = Document(BytesIO(content))
-            text = "\n".join(p.text for p in doc.paragraphs)
+            if isinstance(source, str):
+                source = await to_thread(_read_local_file, source)
+            text = source.decode("utf-8")
             return text
+        case "application/pdf" | "application/json" | \
+             "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+            return await parser_pool.parse(source, content_type)
         case _:
             raise HTTPException(
                 status_code=415,
@@ -58,9 +132,12 @@ def _get_real_mime_type(content: bytes, filename: str):
 
     return real_mime
 
-async def _get_file_extension(content: bytes, filename: str):
-    real_mime = _get_real_mime_type(content, filename)
+def _read_local_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
 
+def _get_extension(real_mime: str, filename: str):
     if real_mime in ALLOWED_BINARY_TYPES:
         return ALLOWED_BINARY_TYPES[real_mime]
 
@@ -78,6 +155,13 @@ async def _get_file_extension(content: bytes, filename: str):
     )
 
 
+def get_object_name(file: CandidateFile):
+    # files stored before content addressing are kept under their row id
+    if file.object_name:
+        return file.object_name
+    return str(file.id) + get_file_extension_minio(file)
+
+
 def get_file_extension_minio(file: CandidateFile):
     if file.content_type.startswith("text/"):
         filename = file.file_name
@@ -88,45 +172,111 @@ def get_file_extension_minio(file: CandidateFile):
     return ext
 
 
-async def read_files(files: List[UploadFile]):
+async def read_files(files: List[UploadFile], session: AsyncSession):
     full_text = ""
     processed_files = []
     error_files = []
 
-    for i, file in enumerate(files):
-        try:
-            content = await file.read()
-            text = await _process_file(content, file.filename)
-            full_text += f"{i}: {text}\n"
-
-            await file.seek(0)
-            processed_files.append(file)
-        except:
-            error_file = FileError(file_name=file.filename, reason="Unreadable text")
+    ingested_files = await gather(*[ingest_upload(file) for file in files], return_exceptions=True)
+    known_texts = await _get_known_texts(
+        [ingested.sha256 for ingested in ingested_files if not isinstance(ingested, Exception)], session)
+    results = await gather(*[_extract_text(ingested, known_texts) for ingested in ingested_files],
+                           return_exceptions=True)
+
+    for i, (file, ingested) in enumerate(zip(files, results)):
+        if isinstance(ingested, Exception):
+            too_large = isinstance(ingested, HTTPException) and ingested.status_code == 413
+            error_file = FileError(file_name=file.filename, reason=ingested.detail if too_large else "Unreadable text")
             error_files.append(error_file)
+            continue
+
+        full_text += f"{i}: {ingested.text}\n"
+        processed_files.append(ingested)
 
     return full_text, processed_files, error_files
 
 
-async def read_files_from_minio(files: List[CandidateFile]):
+async def read_upload(file: UploadFile, session: AsyncSession) -> IngestedFile:
+    ingested = await ingest_upload(file)
+    known_texts = await _get_known_texts([ingested.sha256], session)
+    return await _extract_text(ingested, known_texts)
+
+
+async def _extract_text(ingested: IngestedFile | Exception, known_texts: dict) -> IngestedFile:
+    if isinstance(ingested, Exception):
+        raise ingested
+
+    # a file with the same content was parsed before
+    if ingested.sha256 in known_texts:
+        ingested.text = known_texts[ingested.sha256]
+        return ingested
+
+    try:
+        ingested.text = str(await _process_file(ingested.source, ingested.file_name, ingested.content_type))
+    except Exception:
+        ingested.discard()
+        raise
+    return ingested
+
+
+async def _get_known_texts(hashes: List[str], session: AsyncSession):
+    if not hashes:
+        return {}
+    result = await session.execute(
+        select(CandidateFile.sha256, CandidateFile.extracted_text)
+        .where(CandidateFile.sha256.in_(hashes), CandidateFile.extracted_text.is_not(None))
+        .distinct(CandidateFile.sha256)
+    )
+    return {sha256: text for sha256, text in result.all()}
+
+
+async def read_files_from_minio(files: List[CandidateFile], session: AsyncSession):
     full_text = ""
     processed_files = []
     error_files = []
 
+    stored_texts = await _get_extracted_texts(files, session)
+    missing = [file for file in files if stored_texts.get(file.id) is None]
+    parsed = await gather(*[_read_minio_file(file) for file in missing], return_exceptions=True)
+    parsed_texts = {file.id: text for file, text in zip(missing, parsed)}
+
     for i, file in enumerate(files):
-        ext = get_file_extension_minio(file)
-        minio_file = await to_thread(minio_client.get_object,settings.MINIO_BUCKET, str(file.id) + ext)
-        try:
-            content = minio_file.read()
-            text = await _process_file(content, file.file_name, file.content_type)
-            full_text += f"{i}: {text}\n"
-
-            processed_files.append(file)
-        except:
-            error_file = FileError(file_name=file.file_name, reason="Unreadable text")
-            error_files.append(error_file)
+        text = stored_texts.get(file.id)
+        if text is None:
+            text = parsed_texts[file.id]
+            if isinstance(text, Exception):
+                error_file = FileError(file_name=file.file_name, reason="Unreadable text")
+                error_files.append(error_file)
+                continue
+            await session.execute(update(CandidateFile).where(CandidateFile.id == file.id).values(extracted_text=text))
+
+        # expose the text on the returned files without marking them dirty
+        set_committed_value(file, "extracted_text", text)
+        full_text += f"{i}: {text}\n"
+        processed_files.append(file)
 
     return full_text, processed_files, error_files
 
 
+def _read_minio_object(object_name: str) -> bytes:
+    minio_file = minio_client.get_object(settings.MINIO_BUCKET, object_name)
+    try:
+        return minio_file.read()
+    finally:
+        minio_file.close()
+        minio_file.release_conn()
 
+
+async def _read_minio_file(file: CandidateFile):
+    content = await to_thread(_read_minio_object, get_object_name(file))
+    return str(await _process_file(content, file.file_name, file.content_type))
+
+
+async def _get_extracted_texts(files: List[CandidateFile], session: AsyncSession):
+    if not files:
+        return {}
+    result = await session.execute(
+        select(CandidateFile.id, CandidateFile.extracted_text)
+        .where(CandidateFile.id.in_([file.id for file in files]))
+    )
+    return {file_id: text for file_id, text in result.all()}
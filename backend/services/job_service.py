@@ -0,0 +1,315 @@
+import asyncio
+import os
+import socket
+from asyncio import to_thread, gather
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from typing import List
+from uuid import UUID, uuid4
+
+from fastapi import UploadFile, HTTPException
+from sqlalchemy import select, update, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import Headers
+
+from core.config import settings
+from core.sse import format_sse
+from db.session import asyncSession
+from models.evaluation_job import EvaluationJob
+from object_storage.minio_client import minio_client
+from schemas.job_schemas import JobKind, JobStatus, JobResponse, BatchGroupBy
+from services.ai_service import generate_answer, refresh_candidate
+from services.batch_service import run_batch
+from services.candidate_service import get_candidate_by_id
+from services.position_service import get_position_by_id
+
+FINISHED_STATUSES = {JobStatus.DONE.value, JobStatus.FAILED.value}
+
+# Identifies this process in `EvaluationJob.claimed_by`, so replicas only re-queue jobs whose lease expired.
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+async def _stage_file(job_id: UUID, index: int, file: UploadFile):
+    object_name = f"jobs/{job_id}/{index}"
+    await file.seek(0)
+    await to_thread(minio_client.put_object, settings.MINIO_BUCKET, object_name, file.file, file.size,
+                    file.content_type or "application/octet-stream")
+    return {"object_name": object_name, "file_name": file.filename, "content_type": file.content_type,
+            "file_size": file.size}
+
+
+def _read_staged_object(object_name: str) -> bytes:
+    response = minio_client.get_object(settings.MINIO_BUCKET, object_name)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+async def _load_staged_file(staged: dict) -> UploadFile:
+    content = await to_thread(_read_staged_object, staged["object_name"])
+    headers = Headers({"content-type": staged["content_type"]}) if staged.get("content_type") else None
+    return UploadFile(file=BytesIO(content), filename=staged["file_name"], size=len(content), headers=headers)
+
+
+async def _remove_staged_files(files: List[dict]):
+    tasks = [to_thread(minio_client.remove_object, settings.MINIO_BUCKET, file["object_name"]) for file in files]
+    if tasks:
+        await gather(*tasks, return_exceptions=True)
+
+
+async def _stage_files(job_id: UUID, files: List[UploadFile]):
+    try:
+        staged_files = await gather(*[_stage_file(job_id, i, file) for i, file in enumerate(files)])
+    except Exception:
+        await _remove_staged_files([{"object_name": f"jobs/{job_id}/{i}"} for i in range(len(files))])
+        raise HTTPException(status_code=500, detail="Can't store uploaded files")
+    return list(staged_files)
+
+
+async def enqueue_generate_job(prompt: str, position_id: UUID, files: List[UploadFile], websearch: bool,
+                               session: AsyncSession):
+    await get_position_by_id(position_id, session)
+
+    job_id = uuid4()
+    staged_files = await _stage_files(job_id, files)
+
+    job = EvaluationJob(id=job_id, kind=JobKind.GENERATE.value, status=JobStatus.QUEUED.value, prompt=prompt,
+                        websearch=websearch, position_id=position_id, files=staged_files)
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    job_worker_pool.notify()
+    return job
+
+
+async def enqueue_batch_job(prompt: str, position_id: UUID, files: List[UploadFile], websearch: bool,
+                            group_by: BatchGroupBy, session: AsyncSession):
+    await get_position_by_id(position_id, session)
+
+    job_id = uuid4()
+    staged_files = await _stage_files(job_id, files)
+
+    job = EvaluationJob(id=job_id, kind=JobKind.BATCH.value, status=JobStatus.QUEUED.value, prompt=prompt,
+                        websearch=websearch, position_id=position_id, files=staged_files, group_by=group_by.value)
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    job_worker_pool.notify()
+    return job
+
+
+async def enqueue_refresh_job(candidate_id: UUID, prompt: str | None, websearch: bool, session: AsyncSession):
+    candidate = await get_candidate_by_id(candidate_id, session)
+
+    job = EvaluationJob(kind=JobKind.REFRESH.value, status=JobStatus.QUEUED.value, prompt=prompt,
+                        websearch=websearch, position_id=candidate.position_id, candidate_id=candidate_id, files=[])
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    job_worker_pool.notify()
+    return job
+
+
+async def get_job_by_id(job_id: UUID, session: AsyncSession):
+    job = await session.get(EvaluationJob, job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
+
+
+async def job_events(job_id: UUID):
+    last_status = None
+    while True:
+        async with asyncSession() as session:
+            job = await session.get(EvaluationJob, job_id)
+
+        if job is None:
+            yield format_sse("error", {"detail": "Job not found"})
+            return
+
+        if job.status != last_status:
+            last_status = job.status
+            yield format_sse("status", JobResponse.model_validate(job).model_dump(mode="json"))
+
+        if job.status in FINISHED_STATUSES:
+            return
+
+        await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+
+
+async def _claim_next_job():
+    async with asyncSession() as session:
+        result = await session.execute(
+            select(EvaluationJob)
+            .where(EvaluationJob.status == JobStatus.QUEUED.value)
+            .order_by(EvaluationJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = result.scalars().first()
+        if job is None:
+            return None
+
+        job.status = JobStatus.RUNNING.value
+        job.attempts += 1
+        job.claimed_by = INSTANCE_ID
+        job.heartbeat_at = datetime.now(timezone.utc)
+        await session.commit()
+        return job
+
+
+async def _heartbeat(job_id: UUID):
+    while True:
+        await asyncio.sleep(settings.JOB_HEARTBEAT_INTERVAL)
+        try:
+            async with asyncSession() as session:
+                await session.execute(
+                    update(EvaluationJob)
+                    .where(EvaluationJob.id == job_id, EvaluationJob.claimed_by == INSTANCE_ID)
+                    .values(heartbeat_at=func.now())
+                )
+                await session.commit()
+        except Exception as e:
+            print(f"Can't extend the lease of job {job_id}: {e!r}")
+
+
+async def _finish_job(job_id: UUID, status: JobStatus, candidate_id: UUID | None = None, error: str | None = None):
+    values = {"status": status.value, "error": error, "claimed_by": None, "heartbeat_at": None}
+    if candidate_id is not None:
+        values["candidate_id"] = candidate_id
+
+    async with asyncSession() as session:
+        await session.execute(update(EvaluationJob).where(EvaluationJob.id == job_id).values(**values))
+        await session.commit()
+
+
+async def _run_job(job: EvaluationJob):
+    try:
+        if job.kind == JobKind.BATCH.value:
+            await run_batch(job)
+            await _finish_job(job.id, JobStatus.DONE)
+            await _remove_staged_files(job.files)
+            return
+
+        async with asyncSession() as session:
+            if job.kind == JobKind.GENERATE.value:
+                files = await gather(*[_load_staged_file(staged) for staged in job.files])
+                result = await generate_answer(job.prompt, job.position_id, list(files), job.websearch, session)
+            else:
+                result = await refresh_candidate(job.candidate_id, job.prompt, job.websearch, session)
+    except HTTPException as e:
+        await _finish_job(job.id, JobStatus.FAILED, error=str(e.detail))
+    except Exception as e:
+        print(f"Job {job.id} failed: {e!r}")
+        await _finish_job(job.id, JobStatus.FAILED, error="Evaluation failed")
+    else:
+        await _finish_job(job.id, JobStatus.DONE, candidate_id=result.id)
+
+    await _remove_staged_files(job.files)
+
+
+async def requeue_expired_jobs():
+    """Re-queues running jobs whose owner stopped renewing the lease (crashed or was killed). A job that has
+    already been claimed JOB_MAX_ATTEMPTS times is failed instead, so an input that kills its worker is not retried
+    forever."""
+    expired = datetime.now(timezone.utc) - timedelta(seconds=settings.JOB_LEASE_TTL)
+    lease_expired = (EvaluationJob.status == JobStatus.RUNNING.value,
+                     or_(EvaluationJob.heartbeat_at.is_(None), EvaluationJob.heartbeat_at < expired))
+    async with asyncSession() as session:
+        failed = await session.execute(
+            update(EvaluationJob)
+            .where(*lease_expired, EvaluationJob.attempts >= settings.JOB_MAX_ATTEMPTS)
+            .values(status=JobStatus.FAILED.value, claimed_by=None, heartbeat_at=None,
+                    error=f"Evaluation was interrupted {settings.JOB_MAX_ATTEMPTS} times")
+            .returning(EvaluationJob.id, EvaluationJob.files)
+        )
+        failed_jobs = failed.all()
+        requeued = await session.execute(
+            update(EvaluationJob)
+            .where(*lease_expired)
+            .values(status=JobStatus.QUEUED.value, claimed_by=None, heartbeat_at=None)
+        )
+        await session.commit()
+    if requeued.rowcount:
+        print(f"Re-queued {requeued.rowcount} job(s) with an expired lease")
+    for job_id, files in failed_jobs:
+        print(f"Job {job_id} failed after {settings.JOB_MAX_ATTEMPTS} interrupted attempts")
+        await _remove_staged_files(files)
+
+
+async def release_claimed_jobs():
+    """Hands the jobs this process is running back to the queue on shutdown. A clean shutdown does not count as a
+    failed attempt."""
+    async with asyncSession() as session:
+        await session.execute(
+            update(EvaluationJob)
+            .where(EvaluationJob.status == JobStatus.RUNNING.value, EvaluationJob.claimed_by == INSTANCE_ID)
+            .values(status=JobStatus.QUEUED.value, claimed_by=None, heartbeat_at=None,
+                    attempts=EvaluationJob.attempts - 1)
+        )
+        await session.commit()
+
+
+class JobWorkerPool:
+    def __init__(self, workers: int, poll_interval: float):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def start(self):
+        await requeue_expired_jobs()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._reaper()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            await release_claimed_jobs()
+        except Exception as e:
+            print(f"Can't release claimed jobs: {e!r}")
+
+    async def _reaper(self):
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_TTL)
+            try:
+                await requeue_expired_jobs()
+            except Exception as e:
+                print(f"Can't re-queue expired jobs: {e!r}")
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await _claim_next_job()
+            except Exception as e:
+                print(f"Job worker can't claim a job: {e!r}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            heartbeat = asyncio.create_task(_heartbeat(job.id))
+            try:
+                await _run_job(job)
+            except Exception as e:
+                print(f"Job worker can't finish job {job.id}: {e!r}")
+            finally:
+                heartbeat.cancel()
+
+
+job_worker_pool = JobWorkerPool(workers=settings.JOB_WORKERS, poll_interval=settings.JOB_POLL_INTERVAL)
@@ -1,67 +1,118 @@
+from io import BytesIO
 from urllib.parse import quote
 from uuid import UUID, uuid4
 from asyncio import to_thread, gather
+from datetime import datetime, timedelta, timezone
 from typing import List
 
 from fastapi import UploadFile, HTTPException
+from minio.error import S3Error
+from sqlalchemy import select, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import StreamingResponse
 
 from core.config import settings
+from db.session import asyncSession
 from models.candidate_profile import CandidateProfile
+from models.object_lease import ObjectLease
 from object_storage.minio_client import minio_client
 from models.candidate_file import CandidateFile
 from schemas.file_schemas import FileError
-from services.file_service import _get_file_extension, get_file_extension_minio
-
-
-async def _upload_file(file: UploadFile):
-    await file.seek(0)
-    file_id = uuid4()
-    file_id = str(file_id)
-    content = await file.read()
-    file_extension = await _get_file_extension(content, file.filename)
-    await file.seek(0)
-    await to_thread(
-        minio_client.put_object, settings.MINIO_BUCKET, file_id + file_extension, file.file, file.size,
-        file.content_type)
-    return CandidateFile(id=file_id, file_name=file.filename, content_type=file.content_type, file_size=file.size)
-
-async def upload_files(files: List[UploadFile]):
-    upload_files = []
-    error_files = []
+from services.file_service import get_object_name, read_upload, IngestedFile
+
+
+EXPORT_PREFIX = "exports/"
+
+
+def iter_object(minio_response):
+    try:
+        for chunk in minio_response.stream(32 * 1024):
+            yield chunk
+    finally:
+        minio_response.close()
+        minio_response.release_conn()
+
+
+def _object_exists(object_name: str):
+    try:
+        minio_client.stat_object(settings.MINIO_BUCKET, object_name)
+        return True
+    except S3Error as e:
+        if e.code == "NoSuchKey":
+            return False
+        raise
+
+
+def _put_ingested_file(object_name: str, file: IngestedFile):
+    # objects are content addressed, so an existing object already holds these bytes
+    if _object_exists(object_name):
+        return
+    with file.open() as data:
+        minio_client.put_object(settings.MINIO_BUCKET, object_name, data, file.size, file.content_type)
+
+
+def _candidate_file(file: IngestedFile) -> CandidateFile:
+    return CandidateFile(id=uuid4(), file_name=file.file_name, content_type=file.content_type, file_size=file.size,
+                         sha256=file.sha256, object_name=file.sha256 + file.extension, extracted_text=file.text)
+
 
-    tasks = [_upload_file(file) for file in files]
-    results = await gather(*tasks, return_exceptions=True)
+async def _lock_objects(object_names, session: AsyncSession):
+    # serialises leasing and removal of one object across requests and replicas until the transaction ends
+    for object_name in sorted(object_names):
+        await session.execute(select(func.pg_advisory_xact_lock(func.hashtext(object_name))))
 
-    for i, candidate_file in enumerate(results):
-        if isinstance(candidate_file, Exception):
-            error_file = FileError(file_name=files[i].filename, reason="Can't download file")
-            error_files.append(error_file)
+
+async def lease_files(files: List[CandidateFile]):
+    """Leases the objects of files that are about to be uploaded, so a concurrent removal keeps them."""
+    async with asyncSession() as session:
+        await _lock_objects({file.object_name for file in files}, session)
+        session.add_all([ObjectLease(file_id=file.id, object_name=file.object_name) for file in files])
+        await session.commit()
+
+
+async def release_file_leases(files: List[CandidateFile]):
+    """Called once the files are saved (or given up): from then on their rows keep the objects."""
+    if not files:
+        return
+    try:
+        async with asyncSession() as session:
+            await session.execute(delete(ObjectLease).where(ObjectLease.file_id.in_([file.id for file in files])))
+            await session.commit()
+    except Exception as e:
+        # an unreleased lease only delays removal until it expires
+        print(f"Can't release object leases: {e!r}")
+
+
+async def upload_files(files: List[IngestedFile]):
+    """Uploads the files and returns their (unsaved) CandidateFile rows. The objects stay leased until the rows are
+    saved with `create_candidate` or given up with `discard_uploaded_files`."""
+    candidate_files = [_candidate_file(file) for file in files]
+    await lease_files(candidate_files)
+    results = await gather(*[to_thread(_put_ingested_file, candidate_file.object_name, file)
+                             for candidate_file, file in zip(candidate_files, files)], return_exceptions=True)
+
+    uploaded_files = []
+    failed_files = []
+    error_files = []
+    for file, candidate_file, result in zip(files, candidate_files, results):
+        if isinstance(result, Exception):
+            error_files.append(FileError(file_name=file.file_name, reason="Can't download file"))
+            failed_files.append(candidate_file)
         else:
-            upload_files.append(candidate_file)
+            uploaded_files.append(candidate_file)
 
-    return upload_files, error_files
+    await discard_uploaded_files(failed_files)
+    return uploaded_files, error_files
 
 
 async def download_candidate_file(file_id: UUID, session: AsyncSession):
     candidate_file = await session.get(CandidateFile, file_id)
     if not candidate_file:
         raise HTTPException(status_code=404, detail="File not found")
-    ext = get_file_extension_minio(candidate_file)
-    minio_response = minio_client.get_object(settings.MINIO_BUCKET, str(candidate_file.id) + ext)
-
-    def iter_file():
-        try:
-            for chunk in minio_response.stream(32 * 1024):
-                yield chunk
-        finally:
-            minio_response.close()
-            minio_response.release_conn()
-
+    minio_response = minio_client.get_object(settings.MINIO_BUCKET, get_object_name(candidate_file))
     file_name_encoded = quote(candidate_file.file_name)
 
-    return StreamingResponse(iter_file(), media_type=candidate_file.content_type,
+    return StreamingResponse(iter_object(minio_response), media_type=candidate_file.content_type,
                              headers={"Content-Disposition": f"attachment; filename*=utf-8''{file_name_encoded}"})
 
 
@@ -70,11 +121,30 @@ async def upload_candidate_file(candidate_id: UUID, file: UploadFile, session: A
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
 
-    candidate_file = await _upload_file(file)
-
-    candidate.files.append(candidate_file)
-    session.add(candidate)
-    await session.commit()
+    try:
+        ingested = await read_upload(file, session)
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=422, detail="Unreadable text")
+
+    try:
+        uploaded_files, error_files = await upload_files([ingested])
+    finally:
+        ingested.discard()
+    if error_files:
+        raise HTTPException(status_code=502, detail="Can't upload file")
+
+    candidate_file = uploaded_files[0]
+    try:
+        candidate.files.append(candidate_file)
+        session.add(candidate)
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        await discard_uploaded_files(uploaded_files)
+        raise
+    await release_file_leases(uploaded_files)
     return candidate_file
 
 
@@ -83,7 +153,88 @@ async def delete_candidate_file(file_id: UUID, session: AsyncSession):
     candidate_file = await session.get(CandidateFile, file_id)
     if candidate_file is None:
         raise HTTPException(status_code=404, detail="File not found")
-    ext = get_file_extension_minio(candidate_file)
-    await to_thread(minio_client.remove_object, settings.MINIO_BUCKET, str(candidate_file.id) + ext)
     await session.delete(candidate_file)
     await session.commit()
+    await remove_unreferenced_files([candidate_file])
+
+
+async def remove_unreferenced_files(files: List[CandidateFile]):
+    """Removes the objects of deleted (committed) or never saved files that no saved file and no live lease
+    points to."""
+    legacy_objects = [get_object_name(file) for file in files if not file.object_name]
+    shared_objects = {file.object_name for file in files if file.object_name}
+    if shared_objects:
+        lease_cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.OBJECT_LEASE_TTL)
+        async with asyncSession() as session:
+            await _lock_objects(shared_objects, session)
+            referenced = await session.execute(
+                select(CandidateFile.object_name).where(CandidateFile.object_name.in_(shared_objects)).union(
+                    select(ObjectLease.object_name).where(ObjectLease.object_name.in_(shared_objects),
+                                                          ObjectLease.created_at > lease_cutoff))
+            )
+            shared_objects -= set(referenced.scalars().all())
+            # removed while the locks are held, so an upload can't start reusing an object that is going away
+            await remove_objects(list(shared_objects))
+            await session.commit()
+    await remove_objects(legacy_objects)
+
+
+async def discard_uploaded_files(files: List[CandidateFile]):
+    """Compensates an upload whose candidate was never saved: drops its leases and the objects nothing else uses."""
+    if not files:
+        return
+    try:
+        await release_file_leases(files)
+        await remove_unreferenced_files(files)
+    except Exception as e:
+        print(f"Can't remove uploaded objects: {e!r}")
+
+
+async def remove_objects(object_names: List[str]):
+    tasks = [to_thread(minio_client.remove_object, settings.MINIO_BUCKET, name) for name in object_names]
+    if tasks:
+        await gather(*tasks, return_exceptions=True)
+
+
+def export_object_name(candidate_id: UUID, digest: str, extension: str) -> str:
+    return f"{EXPORT_PREFIX}{candidate_id}/{digest}{extension}"
+
+
+def _get_object_or_none(object_name: str):
+    try:
+        return minio_client.get_object(settings.MINIO_BUCKET, object_name)
+    except S3Error as e:
+        if e.code == "NoSuchKey":
+            return None
+        raise
+
+
+async def get_cached_export(object_name: str):
+    """Open MinIO response of a rendered export, or None when it isn't cached (or MinIO can't be read)."""
+    try:
+        return await to_thread(_get_object_or_none, object_name)
+    except Exception as e:
+        print(f"Export cache read failed: {e!r}")
+        return None
+
+
+async def put_cached_export(object_name: str, content: bytes, content_type: str):
+    try:
+        await to_thread(minio_client.put_object, settings.MINIO_BUCKET, object_name, BytesIO(content), len(content),
+                        content_type)
+    except Exception as e:
+        print(f"Export cache write failed: {e!r}")
+
+
+def _list_export_objects(candidate_id: UUID):
+    objects = minio_client.list_objects(settings.MINIO_BUCKET, prefix=f"{EXPORT_PREFIX}{candidate_id}/",
+                                        recursive=True)
+    return [obj.object_name for obj in objects]
+
+
+async def remove_candidate_exports(candidate_id: UUID):
+    """Drops the rendered exports of a candidate whose profile changed or was deleted."""
+    try:
+        await remove_objects(await to_thread(_list_export_objects, candidate_id))
+    except Exception as e:
+        print(f"Can't remove cached exports of {candidate_id}: {e!r}")
@@ -0,0 +1,148 @@
+import re
+from datetime import date
+
+from schemas.candidate_schemas import ShortCandidateInfo
+
+NAME_MARKER = re.compile(
+    r"^[^\w]*(?:ПІБ|П\.І\.Б\.?|ПІП|ФІО|Ф\.И\.О\.?|Прізвище,?\s+ім['’ʼ]я(?:,?\s+по[\s-]батькові)?|Full\s+name|Name)"
+    r"\s*[:\-–—]\s*(.+)", re.IGNORECASE)
+BIRTH_MARKER = re.compile(
+    r"(?:дата\s+народження|народил[асяи]+|народився|д\.\s*н\.|date\s+of\s+birth|birth\s*date|born|DOB)"
+    r"\s*[:\-–—]?\s*(.{0,40})", re.IGNORECASE)
+THIRD_PARTY_MARKERS = re.compile(
+    r"(дідус|бабус|батьк|мат[иі]\b|керівник|професор|викладач|директор|рекомендац|науковий\s+керівник|"
+    r"контактна\s+особа|reference|supervisor|manager)", re.IGNORECASE)
+QUOTED = re.compile(r"[\"'«“„‘][^\"'»”“‘’]*[\"'»”“’]")
+# read_files prefixes every document with its index ("0: ...")
+DOCUMENT_PREFIX = re.compile(r"^\d+:\s*")
+NAME_WORD = re.compile(r"^[A-ZА-ЯІЇЄҐ][a-zа-яіїєґ'’ʼ]+(?:-[A-ZА-ЯІЇЄҐ][a-zа-яіїєґ'’ʼ]+)?$")
+
+PATRONYMIC_ENDINGS = ("ович", "евич", "євич", "йович", "ійович", "івна", "ївна", "овна", "евна", "ич")
+SURNAME_ENDINGS = ("енко", "єнко", "чук", "щук", "юк", "ук", "ський", "цький", "зький", "ська", "цька", "зька",
+                   "ов", "ова", "ев", "ева", "єв", "єва", "ін", "іна", "ин", "ина", "ко", "ак", "як", "ик", "ич",
+                   "ишин", "ий", "ар", "ян")
+COMMON_FIRST_NAMES = frozenset("""
+Олександр Олександра Андрій Анна Антон Анастасія Артем Богдан Богдана Вадим Валентина Валерій Василь Вікторія
+Віктор Віталій Владислав Володимир Вʼячеслав В'ячеслав Галина Григорій Дарина Денис Дмитро Євген Євгенія Олена
+Ігор Ірина Іван Ілля Катерина Кирило Костянтин Лариса Леонід Людмила Максим Марина Марія Микола Михайло Надія
+Назар Наталія Олег Оксана Ольга Павло Петро Роман Руслан Сергій Світлана Софія Станіслав Степан Тарас Тетяна
+Юлія Юрій Ярослав Ярослава Яна Вероніка Христина Остап Данило Зоряна Любов Лілія Орест Мирослав Мирослава
+""".split())
+MONTHS = {"січ": 1, "лют": 2, "бер": 3, "квіт": 4, "трав": 5, "черв": 6, "лип": 7, "серп": 8, "верес": 9,
+          "жовт": 10, "листоп": 11, "груд": 12, "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+          "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12}
+NUMERIC_DATE = re.compile(r"\b(\d{1,2})[./-](\d{1,2})[./-](\d{4})\b|\b(\d{4})-(\d{2})-(\d{2})\b")
+WORD_DATE = re.compile(r"\b(\d{1,2})\s+([a-zа-яіїє]+)\.?\s+(\d{4})", re.IGNORECASE)
+
+# Lines at the top of a CV are where the candidate's own name usually is.
+HEADER_LINES = 15
+
+
+def _is_patronymic(word: str):
+    return word.lower().endswith(PATRONYMIC_ENDINGS) and len(word) > 5
+
+
+def _is_surname(word: str):
+    return word.lower().endswith(SURNAME_ENDINGS)
+
+
+def _name_words(text: str):
+    words = []
+    for word in QUOTED.sub(" ", text).replace(",", " ").split():
+        if not NAME_WORD.match(word):
+            break
+        words.append(word)
+        if len(words) == 3:
+            break
+    return words
+
+
+def _split_name(words: list[str]):
+    """Returns (last, first, middle, confidence) for 2-3 capitalised words in any common Ukrainian order."""
+    if len(words) == 3 and _is_patronymic(words[2]):
+        last, first, middle = words
+    elif len(words) == 3 and _is_patronymic(words[1]):
+        first, middle, last = words
+    elif words[0] in COMMON_FIRST_NAMES or words[0].isascii() or (_is_surname(words[1]) and not _is_surname(words[0])):
+        first, last, middle = words[0], words[1], None
+    else:
+        last, first, middle = words[0], words[1], None
+
+    confidence = 0.0
+    if middle:
+        confidence += 0.3
+    if first in COMMON_FIRST_NAMES:
+        confidence += 0.3
+    if _is_surname(last):
+        confidence += 0.1
+    return last, first, middle, confidence
+
+
+def _find_name(text: str):
+    lines = [DOCUMENT_PREFIX.sub("", line.strip()) for line in text.splitlines() if line.strip()]
+
+    for line in lines:
+        match = NAME_MARKER.match(line)
+        if match:
+            words = _name_words(match.group(1))
+            if len(words) >= 2:
+                last, first, middle, confidence = _split_name(words)
+                return last, first, middle, confidence + 0.4
+
+    for line in lines[:HEADER_LINES]:
+        if THIRD_PARTY_MARKERS.search(line):
+            continue
+        words = _name_words(line)
+        # a header line holding only the name (optionally followed by ", ...") is a strong hint, a name inside a
+        # sentence is not
+        if len(words) >= 2 and len(line.split(",")[0].split()) == len(words):
+            last, first, middle, confidence = _split_name(words)
+            if confidence > 0:
+                return last, first, middle, confidence + 0.3
+    return None
+
+
+def _parse_date(text: str):
+    match = NUMERIC_DATE.search(text)
+    if match:
+        if match.group(4):
+            year, month, day = int(match.group(4)), int(match.group(5)), int(match.group(6))
+        else:
+            day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+    else:
+        match = WORD_DATE.search(text)
+        if not match:
+            return None
+        month_word = match.group(2).lower()
+        month = next((number for prefix, number in MONTHS.items() if month_word.startswith(prefix)), None)
+        if month is None:
+            return None
+        day, year = int(match.group(1)), int(match.group(3))
+
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def _find_birth_date(text: str):
+    for match in BIRTH_MARKER.finditer(text):
+        birth_date = _parse_date(match.group(1))
+        if birth_date:
+            return birth_date
+    return None
+
+
+def extract_candidate_info(text: str) -> tuple[ShortCandidateInfo | None, float]:
+    """Finds the candidate's name and birth date without the LLM.
+
+    Returns the extracted info and a confidence in 0..1: a "ПІБ:"-style marker, a patronymic, a common first name and a
+    typical surname ending each add to it. Callers should fall back to the LLM below their threshold.
+    """
+    found = _find_name(text)
+    if found is None:
+        return None, 0.0
+
+    last, first, middle, confidence = found
+    info = ShortCandidateInfo(LastName=last, FirstName=first, MiddleName=middle, BirthDate=_find_birth_date(text))
+    return info, min(confidence, 1.0)
@@ -0,0 +1,166 @@
+import re
+import zlib
+from functools import lru_cache
+from itertools import permutations
+from typing import List, Optional
+
+import numpy as np
+
+FULL_NAME_KEYS = ("fullName", "full_name", "pib")
+# Also used for companies and court cases, so not read when the record's type marks one of those.
+GENERIC_NAME_KEYS = ("name", "nameUa", "nameEn")
+RECORD_TYPE_KEYS = ("type", "subjectType", "entityType", "personType")
+NON_PERSON_TYPES = ("company", "organization", "organisation", "legal", "court", "case", "юридич", "компан",
+                    "організац", "справ")
+SURNAME_KEYS = ("surname", "lastName", "last_name")
+FIRST_NAME_KEYS = ("firstname", "firstName", "first_name")
+PATRONYMIC_KEYS = ("patronymic", "middleName", "middle_name")
+BIRTH_KEYS = ("dateOfBirth", "birthDate", "birth_date", "DateOfBirth", "yearOfBirth", "birthYear")
+
+TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "h", "ґ": "g", "д": "d", "е": "e", "є": "ie", "ж": "zh", "з": "z", "и": "y",
+    "і": "i", "ї": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s",
+    "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch", "ь": "", "ю": "iu",
+    "я": "ia", "ы": "y", "э": "e", "ё": "io", "ъ": "", "'": "", "’": "", "ʼ": "", "`": "",
+})
+# Spellings that differ between Ukrainian, Russian and Latin transliterations of the same name
+# (Гнатюк/Gnatyuk, Олексій/Alexei, Юрій/Yuriy, Сергій/Сергей) are folded to one skeleton before n-grams are taken.
+VARIANT_FOLDS = (("shch", "sc"), ("kh", "h"), ("ks", "x"), ("ts", "c"), ("g", "h"), ("w", "v"), ("j", "i"),
+                 ("y", "i"), ("ii", "i"), ("ie", "e"), ("ei", "i"), ("iu", "u"), ("ia", "a"))
+# Russian forms of names that start with "Ол" in Ukrainian (Олександр/Александр, Олексій/Алексей)
+RUSSIAN_INITIAL_A = re.compile(r"^al")
+YEAR = re.compile(r"(?<!\d)(1[89]\d\d|20\d\d)(?!\d)")
+
+VECTOR_SIZE = 1024
+NGRAM = 3
+
+
+def name_token(value: str) -> str:
+    """Lower-cased, transliterated form, so Cyrillic and Latin spellings meet."""
+    return value.lower().translate(TRANSLIT)
+
+
+def tokens(value: Optional[str]) -> List[str]:
+    return [name_token(part) for part in (value or "").replace(",", " ").split()]
+
+
+@lru_cache(maxsize=65536)
+def _skeleton(token: str) -> str:
+    token = re.sub(r"[^a-z]", "", token)
+    for variant, folded in VARIANT_FOLDS:
+        token = token.replace(variant, folded)
+    return RUSSIAN_INITIAL_A.sub("ol", token)
+
+
+def name_keys(name_tokens: List[str]) -> List[str]:
+    """Folded spelling skeletons of name tokens, usable as exact lookup keys."""
+    return [_skeleton(token) for token in name_tokens]
+
+
+def _first(record: dict, keys) -> Optional[str]:
+    for key in keys:
+        value = record.get(key)
+        if isinstance(value, str) and value.strip():
+            return value
+    return None
+
+
+def is_person_record(record: dict) -> bool:
+    """False only for records whose type field marks a company or a court case; list datasets of people are
+    usually untyped."""
+    record_type = _first(record, RECORD_TYPE_KEYS)
+    return record_type is None or not any(marker in record_type.lower() for marker in NON_PERSON_TYPES)
+
+
+def record_tokens(record: dict) -> List[str]:
+    surname, first_name = _first(record, SURNAME_KEYS), _first(record, FIRST_NAME_KEYS)
+    if surname and first_name:
+        return tokens(surname) + tokens(first_name) + tokens(_first(record, PATRONYMIC_KEYS))
+    full_name = _first(record, FULL_NAME_KEYS)
+    if full_name is None and is_person_record(record):
+        full_name = _first(record, GENERIC_NAME_KEYS)
+    return tokens(full_name)
+
+
+def extract_year(value) -> Optional[int]:
+    """First plausible year (1800-2099) in a date-like value, without parsing the whole date."""
+    if isinstance(value, int):
+        return value if 1800 <= value <= 2099 else None
+    match = YEAR.search(str(value))
+    return int(match.group(1)) if match else None
+
+
+def record_birth_year(record: dict) -> Optional[int]:
+    for key in BIRTH_KEYS:
+        if record.get(key):
+            year = extract_year(record[key])
+            if year:
+                return year
+    return None
+
+
+@lru_cache(maxsize=65536)
+def _token_ngrams(token: str) -> np.ndarray:
+    padded = f" {_skeleton(token)} "
+    return np.array([zlib.crc32(padded[i:i + NGRAM].encode()) % VECTOR_SIZE
+                     for i in range(len(padded) - NGRAM + 1)], dtype=np.int64)
+
+
+@lru_cache(maxsize=16384)
+def _vector(name_tokens: tuple) -> np.ndarray:
+    # every token is padded separately, so the vector does not depend on name order
+    ngrams = np.concatenate([_token_ngrams(token) for token in name_tokens])
+    vector = np.bincount(ngrams, minlength=VECTOR_SIZE).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _name_score(similarities: np.ndarray, with_patronymic: bool) -> float:
+    """`similarities` is record tokens x (surname, first name, patronymic). Every part of the candidate's name takes
+    a different record token, in any order, and the weakest part is the score."""
+    count = len(similarities)
+    best = 0.0
+    for i, j in permutations(range(count), 2):
+        score = min(similarities[i, 0], similarities[j, 1])
+        if with_patronymic and count > 2:
+            score = min(score, max(similarities[k, 2] for k in range(count) if k not in (i, j)))
+        best = max(best, score)
+    return float(best)
+
+
+def rank_matches(surname: str, first_name: str, patronymic: Optional[str], birth_year: Optional[int],
+                 records: List[dict], threshold: float) -> List[dict]:
+    """Scores all records against the candidate in one matrix product and returns those at or above `threshold`,
+    best first, each with a `match_score` in 0..1.
+
+    Surname, first name and patronymic are scored separately, each as the cosine similarity of hashed
+    character-trigram vectors of a transliterated token, and the record's score is the weakest of them, so a namesake
+    with a different first name does not pass on the surname alone. The patronymic counts only when both sides have
+    one. A record whose known birth year differs from the candidate's is a namesake and is dropped, with or without a
+    name; records without a name field are kept with `match_score: None`, as the source has already matched them by
+    name.
+    """
+    if birth_year:
+        records = [record for record in records if record_birth_year(record) in (None, birth_year)]
+    if not records:
+        return []
+
+    parts = [tokens(surname), tokens(first_name), tokens(patronymic)]
+    candidate = np.stack([_vector(tuple(part)) if part else np.zeros(VECTOR_SIZE, dtype=np.float32)
+                          for part in parts], axis=1)
+    names = [record_tokens(record) for record in records]
+    scores = np.zeros(len(records), dtype=np.float32)
+    record_tokens_flat = [token for name in names for token in name]
+    if record_tokens_flat:
+        similarities = np.stack([_vector((token,)) for token in record_tokens_flat]) @ candidate
+        offsets = np.cumsum([0] + [len(name) for name in names])
+        for i, name in enumerate(names):
+            if name:
+                scores[i] = _name_score(similarities[offsets[i]:offsets[i + 1]], bool(parts[2]))
+
+    ranked = []
+    for i in np.argsort(-scores, kind="stable"):
+        if names[i] and scores[i] < threshold:
+            continue
+        ranked.append({**records[i], "match_score": round(float(scores[i]), 3) if names[i] else None})
+    return ranked
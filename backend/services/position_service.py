@@ -1,20 +1,36 @@
+import time
+from collections import OrderedDict
 from uuid import UUID
 
 from fastapi import HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, lazyload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from core.config import settings
+from models.candidate_profile import CandidateProfile
 from models.position import Position
-from schemas.position_schemas import PositionCreate
+from schemas.position_schemas import PositionCreate, PositionPrompt
+
+# Prompt projections by position id -> (expiry on the monotonic clock, prompt). A deletion only invalidates the
+# entry in this process, so other replicas drop it after POSITION_PROMPT_CACHE_TTL at the latest.
+_position_prompts: OrderedDict[UUID, tuple[float, str]] = OrderedDict()
+
+
+def _with_candidates():
+    # PositionResponse only needs candidate ids and names, so candidate files are not loaded
+    return selectinload(Position.candidates).options(lazyload(CandidateProfile.files))
 
 
 async def get_all_position(session: AsyncSession):
-    result = await session.execute(select(Position))
+    result = await session.execute(select(Position).options(_with_candidates()))
     return result.scalars().all()
 
 
-async def get_position_by_id(position_id: UUID, session: AsyncSession):
-    position = await session.get(Position, position_id)
+async def get_position_by_id(position_id: UUID, session: AsyncSession, with_candidates: bool = False):
+    options = [_with_candidates()] if with_candidates else []
+    position = await session.get(Position, position_id, options=options)
 
     if not position:
         raise HTTPException(status_code=404, detail="Position not found")
@@ -22,11 +38,32 @@ async def get_position_by_id(position_id: UUID, session: AsyncSession):
     return position
 
 
+async def get_position_prompt(position_id: UUID, session: AsyncSession) -> str:
+    """Compact JSON of a position for LLM prompts: name and parameters, without the candidate list."""
+    cached = _position_prompts.get(position_id)
+    if cached is not None and cached[0] > time.monotonic():
+        _position_prompts.move_to_end(position_id)
+        return cached[1]
+
+    position = await get_position_by_id(position_id, session)
+    prompt = PositionPrompt.model_validate(position).model_dump_json()
+    _position_prompts[position_id] = (time.monotonic() + settings.POSITION_PROMPT_CACHE_TTL, prompt)
+    _position_prompts.move_to_end(position_id)
+    while len(_position_prompts) > settings.POSITION_PROMPT_CACHE_MAX_ENTRIES:
+        _position_prompts.popitem(last=False)
+    return prompt
+
+
+def invalidate_position_prompt(position_id: UUID):
+    _position_prompts.pop(position_id, None)
+
+
 async def create_position(position_create: PositionCreate, session: AsyncSession):
     position = Position(name=position_create.name, parameters=position_create.parameters)
     session.add(position)
     await session.commit()
     await session.refresh(position)
+    set_committed_value(position, "candidates", [])
     return position
 
 async def delete_position_by_id(position_id: UUID, session: AsyncSession):
@@ -35,3 +72,4 @@ async def delete_position_by_id(position_id: UUID, session: AsyncSession):
         raise HTTPException(status_code=404, detail="Position not found")
     await session.delete(position)
     await session.commit()
+    invalidate_position_prompt(position_id)
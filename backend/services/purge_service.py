@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+
+from core.config import settings
+from db.session import asyncSession
+from models.embedding_entry import EmbeddingEntry
+from models.llm_cache_entry import LLMCacheEntry
+from models.object_lease import ObjectLease
+from models.youcontrol_cache_entry import YouControlCacheEntry
+
+
+def _retention():
+    # model -> seconds a row is kept; 0 keeps the rows forever
+    return {
+        YouControlCacheEntry: settings.YOUCONTROL_CACHE_TTL,
+        LLMCacheEntry: settings.LLM_CACHE_TTL,
+        EmbeddingEntry: settings.EMBEDDING_CACHE_TTL,
+        ObjectLease: settings.OBJECT_LEASE_TTL,
+    }
+
+
+async def purge_expired_rows() -> dict:
+    """Deletes cache entries and upload leases older than their TTL. Returns the deleted row count per table."""
+    now = datetime.now(timezone.utc)
+    deleted = {}
+    async with asyncSession() as session:
+        for model, ttl in _retention().items():
+            if ttl <= 0:
+                continue
+            result = await session.execute(
+                delete(model).where(model.created_at < now - timedelta(seconds=ttl))
+            )
+            await session.commit()
+            deleted[model.__tablename__] = result.rowcount
+    return deleted
+
+
+class ExpiredRowPurger:
+    """Runs `purge_expired_rows` on startup and then every `interval` seconds."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._purge_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _purge_loop(self):
+        while True:
+            try:
+                deleted = await purge_expired_rows()
+                if any(deleted.values()):
+                    print("Purged expired rows: " + ", ".join(f"{table}={count}" for table, count in deleted.items()))
+            except Exception as e:
+                print(f"Can't purge expired rows: {e!r}")
+            await asyncio.sleep(self.interval)
+
+
+expired_row_purger = ExpiredRowPurger(interval=settings.PURGE_INTERVAL)
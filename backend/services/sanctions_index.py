@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+from asyncio import to_thread
+from itertools import combinations
+from typing import List, Optional
+
+from core.config import settings
+from schemas.youcontrol_schema import CheckResult
+from services.name_matching import tokens, record_tokens, record_birth_year, name_keys
+
+DATASET_EXTENSIONS = (".json", ".jsonl")
+
+
+def _read_dataset(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+
+class SanctionsIndex:
+    """In-memory index of the list datasets: pair of name skeletons -> records of one source.
+
+    Every record is indexed under each pair of its name tokens, so the lookup does not depend on name order
+    ("Surname First Patronymic" vs "First Surname").
+    """
+
+    def __init__(self):
+        # endpoint -> {(key, key): [(keys, birth_year, record)]}
+        self.sources: dict[str, dict[tuple, list]] = {}
+        self.record_count = 0
+
+    @classmethod
+    def from_directory(cls, directory: str, endpoints):
+        index = cls()
+        for endpoint in endpoints:
+            for extension in DATASET_EXTENSIONS:
+                path = os.path.join(directory, endpoint.strip("/") + extension)
+                if os.path.exists(path):
+                    index.add_source(endpoint, _read_dataset(path))
+                    break
+        return index
+
+    def add_source(self, endpoint: str, records: List[dict]):
+        entries = self.sources.setdefault(endpoint, {})
+        for record in records:
+            keys = name_keys(record_tokens(record))
+            if len(keys) < 2:
+                continue
+            entry = (frozenset(keys), record_birth_year(record), record)
+            for pair in {tuple(sorted(pair)) for pair in combinations(keys[:3], 2)}:
+                entries.setdefault(pair, []).append(entry)
+            self.record_count += 1
+
+    def lookup(self, endpoint: str, surname: str, first_name: str, patronymic: Optional[str] = None,
+               birth_year: Optional[int] = None) -> Optional[List[dict]]:
+        """Matching records, or None when the source has no dataset (so it can't be checked)."""
+        entries = self.sources.get(endpoint)
+        if entries is None:
+            return None
+
+        surname_keys, first_keys = name_keys(tokens(surname)), name_keys(tokens(first_name))
+        if not surname_keys or not first_keys:
+            return []
+        patronymic_keys = set(name_keys(tokens(patronymic)))
+        key = tuple(sorted((surname_keys[0], first_keys[0])))
+
+        matches = []
+        for record_keys, record_year, record in entries.get(key, []):
+            # a patronymic only rules a record out when the record has one too
+            if patronymic_keys and len(record_keys) > 2 and not patronymic_keys & record_keys:
+                continue
+            if birth_year and record_year and birth_year != record_year:
+                continue
+            matches.append(record)
+        return matches
+
+
+class LocalSanctionsMirror:
+    """Holds the current SanctionsIndex and rebuilds it when files in `directory` change."""
+
+    def __init__(self, directory: str, reload_interval: float):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.index = SanctionsIndex()
+        self._signature = None
+        self._task: asyncio.Task | None = None
+        self.endpoints = []
+
+    def _dataset_signature(self):
+        try:
+            return tuple(sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                                for entry in os.scandir(self.directory) if entry.name.endswith(DATASET_EXTENSIONS)))
+        except FileNotFoundError:
+            return ()
+
+    async def reload(self, force: bool = False):
+        signature = await to_thread(self._dataset_signature)
+        if signature == self._signature and not force:
+            return
+        try:
+            index = await to_thread(SanctionsIndex.from_directory, self.directory, self.endpoints)
+        except (OSError, ValueError) as e:
+            print(f"Can't import sanctions datasets from {self.directory}: {e!r}")
+            return
+        # readers keep using the old index until the new one is complete
+        self.index = index
+        self._signature = signature
+        print(f"Sanctions index loaded: {index.record_count} records from {len(index.sources)} sources")
+
+    async def start(self, endpoints):
+        self.endpoints = list(endpoints)
+        await self.reload(force=True)
+        if self._task is None:
+            self._task = asyncio.create_task(self._reload_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _reload_loop(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await self.reload()
+
+    def check(self, endpoint: str, source_name: str, surname: str, first_name: str, patronymic: Optional[str],
+              birth_year: Optional[int]) -> CheckResult:
+        matches = self.index.lookup(endpoint, surname, first_name, patronymic, birth_year)
+        if matches is None:
+            return CheckResult(source_name=source_name, match_found=False, details_count=0, raw_data=[],
+                               available=False)
+        return CheckResult(source_name=source_name, match_found=bool(matches), details_count=len(matches),
+                           raw_data=matches)
+
+
+sanctions_mirror = LocalSanctionsMirror(directory=settings.YOUCONTROL_LOCAL_DIR,
+                                        reload_interval=settings.YOUCONTROL_LOCAL_RELOAD_INTERVAL)
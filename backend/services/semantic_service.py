@@ -0,0 +1,54 @@
+import hashlib
+from typing import List
+from uuid import UUID
+
+import httpx
+import numpy as np
+from fastapi import UploadFile, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from llm.embeddings import embedding_store, normalise
+from services.file_service import IngestedFile, read_files, discard_files
+from services.position_service import get_position_prompt
+
+
+async def _embed(position_prompt: str, files: List[IngestedFile]) -> tuple[np.ndarray, np.ndarray]:
+    """Embedding of the position and of every file, from one batched call. File embeddings are cached by sha256."""
+    position_hash = hashlib.sha256(position_prompt.encode("utf-8")).hexdigest()
+    vectors = await embedding_store.embed([(position_hash, position_prompt),
+                                           *((file.sha256, file.text) for file in files)])
+    return vectors[0], vectors[1:]
+
+
+async def file_similarities(position_prompt: str, files: List[IngestedFile]) -> np.ndarray:
+    """Cosine similarity of every file to the position, as one matrix-vector product."""
+    position, matrix = await _embed(position_prompt, files)
+    return matrix @ position
+
+
+async def semantic_relevance(position_prompt: str, files: List[IngestedFile]) -> float | None:
+    """Similarity of a candidate (the mean of its file embeddings) to the position; None if it can't be computed."""
+    try:
+        position, matrix = await _embed(position_prompt, files)
+    except (httpx.HTTPError, HTTPException, KeyError) as e:
+        print(f"Embedding failed, skipping pre-screening: {e!r}")
+        return None
+    return float(normalise(matrix.mean(axis=0)) @ position)
+
+
+async def prescreen_files(position_id: UUID, files: List[UploadFile], session: AsyncSession):
+    if not embedding_store.enabled:
+        raise HTTPException(status_code=503, detail="Embedding model is not configured")
+
+    position_prompt = await get_position_prompt(position_id, session)
+    _, processed_files, error_files = await read_files(files, session)
+    try:
+        scores = await file_similarities(position_prompt, processed_files) if processed_files else np.empty(0)
+    finally:
+        discard_files(processed_files)
+
+    results = [{"file_name": processed_files[i].file_name, "similarity": round(float(scores[i]), 4),
+                "passes": bool(scores[i] >= settings.PRESCREEN_MIN_SIMILARITY)}
+               for i in np.argsort(-scores, kind="stable")]
+    return {"results": results, "error_files": error_files}
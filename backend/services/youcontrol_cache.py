@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from core.config import settings
+from db.session import asyncSession
+from models.youcontrol_cache_entry import YouControlCacheEntry
+
+
+class YouControlCache:
+    """TTL cache of YouControl answers: in-process LRU in front of the youcontrol_cache_entry table.
+
+    Concurrent lookups of the same key share one load (singleflight), so a burst of identical checks costs one
+    API call. Failed loads raise and are not cached.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._memory_hits = 0
+        self._persistent_hits = 0
+        self._misses = 0
+        self._shared_loads = 0
+        self._errors = 0
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        raw = ":".join(str(part) for part in parts)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get_or_load(self, key: str, endpoint: str, loader):
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self._memory_hits += 1
+            return cached[1]
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, endpoint, loader))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self._shared_loads += 1
+        # a cancelled caller must not cancel the load the other callers wait for
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, endpoint: str, loader):
+        entry = await self._read(key)
+        if entry is not None:
+            self._persistent_hits += 1
+            # the row keeps only the TTL it has left, not a fresh one
+            remaining = (entry.created_at - datetime.now(timezone.utc)).total_seconds() + self.ttl
+            self._remember(key, entry.payload, remaining)
+            return entry.payload
+
+        self._misses += 1
+        payload = await loader()
+        self._remember(key, payload, self.ttl)
+        await self._write(key, endpoint, payload)
+        return payload
+
+    async def _read(self, key: str):
+        oldest = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+        try:
+            async with asyncSession() as session:
+                entry = await session.get(YouControlCacheEntry, key)
+        except Exception as e:
+            print(f"YouControl cache read failed: {e!r}")
+            self._errors += 1
+            return None
+        if entry is None or entry.created_at < oldest:
+            return None
+        return entry
+
+    async def _write(self, key: str, endpoint: str, payload):
+        try:
+            async with asyncSession() as session:
+                await session.execute(
+                    insert(YouControlCacheEntry)
+                    .values(key=key, endpoint=endpoint, payload=payload)
+                    .on_conflict_do_update(index_elements=[YouControlCacheEntry.key],
+                                           set_={"payload": payload, "created_at": func.now()})
+                )
+                await session.commit()
+        except Exception as e:
+            print(f"YouControl cache write failed: {e!r}")
+            self._errors += 1
+
+    def _remember(self, key: str, payload, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def metrics(self) -> dict:
+        return {
+            "ttl": self.ttl,
+            "memory_entries": len(self._entries),
+            "memory_hits": self._memory_hits,
+            "persistent_hits": self._persistent_hits,
+            "misses": self._misses,
+            "shared_loads": self._shared_loads,
+            "errors": self._errors,
+        }
+
+
+youcontrol_cache = YouControlCache(ttl=settings.YOUCONTROL_CACHE_TTL, max_entries=settings.YOUCONTROL_CACHE_MAX_ENTRIES)
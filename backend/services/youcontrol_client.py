@@ -0,0 +1,178 @@
+import asyncio
+import random
+import time
+
+import httpx
+
+from core.config import settings
+
+BASE_URL = "https://api.youscore.com.ua/v1"
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class YouControlUnavailable(Exception):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; after `cooldown` one trial request is let through."""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_started: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        # a trial that never reported back (e.g. cancelled) does not block the circuit forever
+        now = time.monotonic()
+        if state == "half-open" and (self._trial_started is None or now - self._trial_started >= self.cooldown):
+            self._trial_started = now
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_started = None
+        if self.failures >= self.threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class YouControlClient:
+    """Shared YouControl client: one pooled httpx client, a token-bucket rate limit, a concurrency cap, retries of
+    transient errors (429, 5xx, connection errors) with jittered backoff and a circuit breaker per endpoint.
+
+    `get` raises `YouControlUnavailable` when the endpoint can't be asked, so callers can tell "no match" from
+    "not checked".
+    """
+
+    def __init__(self, api_key: str, rate: float, burst: int, max_concurrency: int, max_retries: int,
+                 backoff_base: float, backoff_max: float, breaker_threshold: int, breaker_cooldown: float,
+                 timeout: float):
+        self.headers = {"apiKey": api_key, "Accept": "application/json"}
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.timeout = timeout
+        self._bucket = TokenBucket(rate, burst)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._client: httpx.AsyncClient | None = None
+        self._requests = 0
+        self._retries = 0
+        self._rejected = 0
+        self._failures = 0
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=BASE_URL, headers=self.headers, timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _breaker(self, endpoint: str) -> CircuitBreaker:
+        if endpoint not in self._breakers:
+            self._breakers[endpoint] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+        return self._breakers[endpoint]
+
+    def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        # full jitter keeps throttled workers from retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def get(self, endpoint: str, path: str, params: dict | None = None):
+        """GET `path`, where `endpoint` names the circuit it belongs to. Returns the decoded JSON (or [] if empty)."""
+        await self.start()
+        breaker = self._breaker(endpoint)
+        if not breaker.allow():
+            self._rejected += 1
+            raise YouControlUnavailable(f"Circuit for {endpoint} is open")
+
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                await self._bucket.acquire()
+                async with self._semaphore:
+                    self._requests += 1
+                    response = await self._client.get(path, params=params)
+                if response.status_code not in TRANSIENT_STATUS_CODES:
+                    breaker.record_success()
+                    response.raise_for_status()
+                    return response.json() if response.content else []
+            except httpx.TransportError as e:
+                print(f"YouControl {path} failed: {e!r}")
+
+            if attempt < self.max_retries:
+                self._retries += 1
+                await asyncio.sleep(self._backoff(attempt, response))
+
+        self._failures += 1
+        breaker.record_failure()
+        raise YouControlUnavailable(f"YouControl {endpoint} is unavailable")
+
+    def metrics(self) -> dict:
+        return {
+            "requests": self._requests,
+            "retries": self._retries,
+            "rejected_by_breaker": self._rejected,
+            "failures": self._failures,
+            "open_circuits": [endpoint for endpoint, breaker in self._breakers.items() if breaker.state != "closed"],
+        }
+
+
+youcontrol_client = YouControlClient(api_key=settings.YOUCONTROL_API_KEY,
+                                     rate=settings.YOUCONTROL_RATE_LIMIT,
+                                     burst=settings.YOUCONTROL_BURST,
+                                     max_concurrency=settings.YOUCONTROL_MAX_CONCURRENCY,
+                                     max_retries=settings.YOUCONTROL_MAX_RETRIES,
+                                     backoff_base=settings.YOUCONTROL_BACKOFF_BASE,
+                                     backoff_max=settings.YOUCONTROL_BACKOFF_MAX,
+                                     breaker_threshold=settings.YOUCONTROL_BREAKER_THRESHOLD,
+                                     breaker_cooldown=settings.YOUCONTROL_BREAKER_COOLDOWN,
+                                     timeout=settings.YOUCONTROL_TIMEOUT)
@@ -1,18 +1,13 @@
-import httpx
 import asyncio
 from typing import List, Optional
-from core.config import settings
 from schemas.youcontrol_schema import CheckResult
+from services.youcontrol_cache import youcontrol_cache
+from services.youcontrol_client import youcontrol_client, YouControlUnavailable
+from core.config import settings
+from services.name_matching import rank_matches
+from services.sanctions_index import sanctions_mirror
 from dateutil import parser
 
-# Ключ беремо з конфігу
-API_KEY = settings.YOUCONTROL_API_KEY
-BASE_URL = "https://api.youscore.com.ua/v1"
-HEADERS = {
-    "apiKey": API_KEY,
-    "Accept": "application/json"
-}
-
 ENDPOINTS_CONFIG = {
     # --- НАЦБЕЗПЕКА  ---
 
@@ -82,6 +77,24 @@ ENDPOINTS_CONFIG = {
 }
 
 
+class _PartialResult(Exception):
+    """Some detail requests failed: the result is returned to the caller but not cached."""
+
+    def __init__(self, result: dict):
+        self.result = result
+
+
+def _normalise(value: Optional[str]) -> str:
+    return " ".join(value.lower().replace("’", "'").replace("ʼ", "'").split()) if value else ""
+
+
+def _birth_year(birth_date: Optional[str]) -> Optional[int]:
+    try:
+        return parser.parse(birth_date).year if birth_date else None
+    except (ValueError, OverflowError):
+        return None
+
+
 async def check_candidate(
         surname: str,
         name: str,
@@ -89,6 +102,9 @@ async def check_candidate(
         birth_date: Optional[str] = None  # 1. Додаємо аргумент дати
 ) -> List[CheckResult]:
     print("HELLO YOUCONTROL")
+    if settings.YOUCONTROL_MODE == "local":
+        return _check_local(surname, name, patronymic, birth_date)
+
     # Параметри для запиту (YouControl очікує саме такі ключі)
     if patronymic is not None:
         params = {
@@ -101,144 +117,127 @@ async def check_candidate(
             "surname": surname,
             "firstname": name,
         }
+    # Ключ кешу: нормалізоване ПІБ + рік народження (фільтр за датою працює лише з роком)
+    person_key = (_normalise(surname), _normalise(name), _normalise(patronymic), _birth_year(birth_date))
+
+    # Спільний клієнт сам обмежує швидкість і кількість одночасних запитів
+    tasks = [
+        _fetch(
+            endpoint=endpoint,
+            params=params,
+            config=config,  # 2. Передаємо весь конфіг, а не просто назву
+            candidate_birth_date=birth_date,  # 3. Передаємо дату для Smart Filter
+            person_key=person_key
+        )
+        for endpoint, config in ENDPOINTS_CONFIG.items()
+    ]
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        tasks = [
-            _fetch(
-                client=client,
-                endpoint=endpoint,
-                params=params,
-                config=config,  # 2. Передаємо весь конфіг, а не просто назву
-                candidate_birth_date=birth_date  # 3. Передаємо дату для Smart Filter
-            )
-            for endpoint, config in ENDPOINTS_CONFIG.items()
-        ]
-
-        results = await asyncio.gather(*tasks)
+    results = await asyncio.gather(*tasks)
 
     # 4. Фільтрація для LLM
-    # Повертаємо тільки ті результати, де match_found = True.
-    return [res for res in results if res.match_found]
+    # Повертаємо результати зі збігами, а також джерела, які не вдалося перевірити,
+    # щоб "не перевірено" не виглядало як "збігів немає".
+    return [res for res in results if res.match_found or not res.available]
+
+
+def _check_local(surname: str, name: str, patronymic: Optional[str], birth_date: Optional[str]) -> List[CheckResult]:
+    # Локальний режим: відповідь з індексу завантажених списків, без запитів до API
+    birth_year = _birth_year(birth_date)
+    results = [sanctions_mirror.check(endpoint, config["name"], surname, name, patronymic, birth_year)
+               for endpoint, config in ENDPOINTS_CONFIG.items()]
+    return [res for res in results if res.match_found or not res.available]
 
 
 async def _fetch(
-        client: httpx.AsyncClient,
         endpoint: str,
         params: dict,
         config: dict,
-        candidate_birth_date: Optional[str] = None  # Новий аргумент (формат 'YYYY-MM-DD' або 'YYYY')
+        candidate_birth_date: Optional[str] = None,  # Новий аргумент (формат 'YYYY-MM-DD' або 'YYYY')
+        person_key: tuple = ()
 ) -> CheckResult:
     source_name = config["name"]
+    cache_key = youcontrol_cache.make_key("search", endpoint, *person_key)
 
     try:
-        # КРОК 1: Первинний пошук
-        response = await client.get(f"{BASE_URL}{endpoint}", params=params, headers=HEADERS)
-
-        if response.status_code != 200:
-            return CheckResult(source_name=source_name, match_found=False, details_count=0, raw_data=[])
-
-        data = response.json()
-
-        # Нормалізація
-        items = []
-        if isinstance(data, list):
-            items = data
-        elif isinstance(data, dict) and data:
-            items = [data]
-
-        if not items:
-            return CheckResult(source_name=source_name, match_found=False, details_count=0, raw_data=[])
-
-        # Змінна для даних
-        final_data = items
-
-        # КРОК 2: Двоетапний запит
-        if config.get("is_two_step"):
-            detail_tasks = []
-            template = config["detail_template"]
-            id_field_name = config.get("id_field", "id")
-
-            for item in items:
-                item_id = item.get(id_field_name)
-                if item_id:
-                    detail_tasks.append(_fetch_details(client, template, str(item_id)))
-
-            if detail_tasks:
-                details_results = await asyncio.gather(*detail_tasks)
-                final_data = [d for d in details_results if d is not None]
-
-        # КРОК 3: Фільтрація за датою народження (Нова логіка)
-        if candidate_birth_date and final_data:
-            final_data = _filter_by_birth_year(final_data, candidate_birth_date)
-
-        # Якщо після фільтрації нічого не лишилось
-        if not final_data:
-            return CheckResult(source_name=source_name, match_found=False, details_count=0, raw_data=[])
-
-        return CheckResult(
-            source_name=source_name,
-            match_found=True,
-            details_count=len(final_data),
-            raw_data=final_data
-        )
-
+        result = await youcontrol_cache.get_or_load(
+            cache_key, endpoint, lambda: _search(endpoint, params, config, candidate_birth_date))
+    except _PartialResult as e:
+        result = {**e.result, "available": False}
     except Exception as e:
-        print(f"Error checking {source_name}: {e}")
-        return CheckResult(source_name=source_name, match_found=False, details_count=0, raw_data=[])
-
+        print(f"Error checking {source_name}: {e!r}")
+        return CheckResult(source_name=source_name, match_found=False, details_count=0, raw_data=[], available=False)
+    return CheckResult(**result)
 
-async def _fetch_details(client: httpx.AsyncClient, url_template: str, item_id: str) -> dict:
-    """Робить запит на отримання деталей по конкретному ID"""
-    try:
-        # Підставляємо ID в URL (наприклад: .../corruptedPersons/12345)
-        url = f"{BASE_URL}{url_template.format(id=item_id)}"
-        response = await client.get(url, headers=HEADERS)
-        if response.status_code == 200:
-            return response.json()
-    except Exception:
-        print("You Control Exception")
-        pass
-    return None
 
+async def _search(
+        endpoint: str,
+        params: dict,
+        config: dict,
+        candidate_birth_date: Optional[str] = None
+) -> dict:
+    source_name = config["name"]
+    no_match = {"source_name": source_name, "match_found": False, "details_count": 0, "raw_data": []}
+
+    # КРОК 1: Первинний пошук
+    # Помилки не кешуються: недоступність API — виняток, а не "збігів немає"
+    data = await youcontrol_client.get(endpoint, endpoint, params=params)
+
+    # Нормалізація
+    items = []
+    if isinstance(data, list):
+        items = data
+    elif isinstance(data, dict) and data:
+        items = [data]
+
+    if not items:
+        return no_match
+
+    # Змінна для даних
+    final_data = items
+    complete = True
+
+    # КРОК 2: Двоетапний запит
+    if config.get("is_two_step"):
+        detail_tasks = []
+        template = config["detail_template"]
+        id_field_name = config.get("id_field", "id")
+
+        for item in items:
+            item_id = item.get(id_field_name)
+            if item_id:
+                detail_tasks.append(_fetch_details(template, str(item_id)))
+
+        if detail_tasks:
+            details_results = await asyncio.gather(*detail_tasks)
+            final_data = [d for d in details_results if d is not None]
+            complete = len(final_data) == len(details_results)
+
+    # КРОК 3: Ранжування за схожістю імені (з урахуванням транслітерації) та роком народження
+    final_data = rank_matches(params["surname"], params["firstname"], params.get("patronymic"),
+                              _birth_year(candidate_birth_date), final_data, settings.NAME_MATCH_THRESHOLD)
+
+    # Якщо після фільтрації нічого не лишилось
+    result = no_match
+    if final_data:
+        result = {"source_name": source_name, "match_found": True, "details_count": len(final_data),
+                  "raw_data": final_data}
+    if not complete:
+        raise _PartialResult(result)
+    return result
+
+
+async def _fetch_details(url_template: str, item_id: str) -> dict:
+    """Робить запит на отримання деталей по конкретному ID (кешується за resultId)"""
+    path = url_template.format(id=item_id)
+
+    async def load():
+        return await youcontrol_client.get(url_template, path)
 
-def _filter_by_birth_year(records: List[dict], candidate_date: str) -> List[dict]:
-    """
-    Залишає тільки ті записи, де рік народження збігається або дата відсутня.
-    """
     try:
-        # Витягуємо рік з дати кандидата
-        candidate_year = str(parser.parse(candidate_date).year)
-    except:
-        # Якщо дата кандидата крива, не фільтруємо нічого
-        return records
-
-    filtered_records = []
-
-    # Ключі, в яких API YouScore зазвичай віддає дату народження
-    date_keys = ['dateOfBirth', 'birthDate', 'birth_date', 'DateOfBirth', 'yearOfBirth']
-
-    for record in records:
-        record_year = None
-
-        # 1. Шукаємо дату в відомих полях
-        for key in date_keys:
-            if key in record and record[key]:
-                try:
-                    # Пробуємо розпарсити дату з запису
-                    dt = parser.parse(str(record[key]))
-                    record_year = str(dt.year)
-                    break
-                except:
-                    continue
-
-        # 2. Логіка рішення
-        if record_year:
-            # Якщо в запису Є дата, і вона НЕ збігається -> видаляємо (не додаємо в список)
-            if record_year == candidate_year:
-                filtered_records.append(record)
-        else:
-            # Якщо в запису НЕМАЄ дати (або ми не знайшли) -> залишаємо!
-            # Хай краще LLM розбереться, ніж ми випадково видалимо правильного
-            filtered_records.append(record)
-
-    return filtered_records
+        return await youcontrol_cache.get_or_load(youcontrol_cache.make_key("details", url_template, item_id),
+                                                  url_template, load)
+    except YouControlUnavailable as e:
+        print(f"You Control Exception: {e}")
+    except Exception as e:
+        print(f"You Control Exception: {e!r}")
+    return None
@@ -0,0 +1,56 @@
+"""Measures the local name extractor against the labelled corpus in tools/data/name_extraction_corpus.jsonl.
+
+A sample counts as accepted when its confidence reaches the threshold; accepted samples skip the LLM, so their
+precision is what matters. Samples without an expected name should stay below the threshold.
+
+    python -m tools.evaluate_name_extractor --threshold 0.7
+"""
+import argparse
+import json
+from pathlib import Path
+
+from services.name_extractor import extract_candidate_info
+
+CORPUS = Path(__file__).parent / "data" / "name_extraction_corpus.jsonl"
+FIELDS = ("LastName", "FirstName", "MiddleName", "BirthDate")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--corpus", type=Path, default=CORPUS)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    samples = [json.loads(line) for line in args.corpus.read_text(encoding="utf-8").splitlines() if line.strip()]
+    accepted = correct = correct_rejections = 0
+    field_hits = dict.fromkeys(FIELDS, 0)
+
+    for sample in samples:
+        expected = sample["expected"]
+        info, confidence = extract_candidate_info(sample["text"])
+        actual = info.model_dump() if info else dict.fromkeys(FIELDS)
+        is_accepted = info is not None and confidence >= args.threshold
+
+        for field in FIELDS:
+            field_hits[field] += actual[field] == expected[field]
+        if is_accepted:
+            accepted += 1
+            correct += all(actual[field] == expected[field] for field in ("LastName", "FirstName", "MiddleName"))
+        elif expected["LastName"] is None:
+            correct_rejections += 1
+
+        if args.verbose:
+            print(f"{confidence:.2f} {'accept' if is_accepted else 'llm   '} {actual} expected {expected}")
+
+    total = len(samples)
+    print(f"samples: {total}")
+    print(f"handled locally: {accepted}/{total} ({accepted / total:.0%})")
+    print(f"precision of local answers (name): {correct}/{accepted}" if accepted else "no local answers")
+    print(f"no-name samples sent to LLM: {correct_rejections}/{sum(s['expected']['LastName'] is None for s in samples)}")
+    for field, hits in field_hits.items():
+        print(f"{field} accuracy: {hits / total:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Minimal stand-in for an Ollama node, for exercising the LLM router without a model.
+
+Implements `/api/ps`, `/api/generate` (plain and streamed) and `/api/embed`. Every answer is the same JSON document,
+produced after `--delay` seconds; embeddings are hashed bags of words, so texts sharing words are similar.
+`--fail-rate` makes a share of requests return 500 and `--down` makes every request fail.
+
+    python -m tools.ollama_stub --port 11501 --delay 0.5
+    OLLAMA_BACKENDS='["http://localhost:11501","http://localhost:11502"]' uvicorn main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import zlib
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+ANSWER = {"candidate": {"full_name": "Stub Candidate"}, "evaluation": {"overall_profile_index": 5},
+          "summary": "stub"}
+EMBEDDING_SIZE = 256
+
+
+def embed_text(text: str) -> list:
+    vector = [0.0] * EMBEDDING_SIZE
+    for word in re.findall(r"\w+", text.lower()):
+        vector[zlib.crc32(word.encode()) % EMBEDDING_SIZE] += 1.0
+    return vector
+
+
+def create_app(model: str, delay: float, fail_rate: float, down: bool):
+    app = FastAPI()
+    state = {"in_flight": 0, "served": 0}
+
+    def check_failure():
+        if down or random.random() < fail_rate:
+            raise HTTPException(status_code=500, detail="stub failure")
+
+    @app.get("/api/ps")
+    async def ps():
+        check_failure()
+        return {"models": [{"name": model, "model": model}], "in_flight": state["in_flight"],
+                "served": state["served"]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        check_failure()
+        body = await request.json()
+        answer = json.dumps(ANSWER)
+        usage = {"prompt_eval_count": len(body.get("prompt", "")) // 4, "prompt_eval_duration": int(delay * 1e9)}
+
+        state["in_flight"] += 1
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            state["in_flight"] -= 1
+        state["served"] += 1
+
+        if not body.get("stream", True):
+            return {"model": body.get("model"), "response": answer, "done": True, **usage}
+
+        async def chunks():
+            for i in range(0, len(answer), 8):
+                yield json.dumps({"response": answer[i:i + 8], "done": False}) + "\n"
+            yield json.dumps({"response": "", "done": True, **usage}) + "\n"
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        check_failure()
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        return {"model": body.get("model"), "embeddings": [embed_text(text) for text in inputs],
+                "prompt_eval_count": sum(len(text) // 4 for text in inputs)}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=11501)
+    parser.add_argument("--model", default="ai_model")
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--down", action="store_true")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.model, args.delay, args.fail_rate, args.down), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Measures prompt-eval time saved by the prefix-stable prompt layout.
+
+Sends the same synthetic candidates against one position twice: with the old layout (everything in `prompt`, the
+position JSON listing previously evaluated candidates) and with the current layout (instructions and position in
+`system`). Ollama reports `prompt_eval_count`/`prompt_eval_duration` only for tokens it actually had to evaluate,
+so the difference is the work saved by KV-cache reuse.
+
+    python -m tools.prefix_cache_benchmark --ollama http://localhost:11434 --model gemma3:12b --candidates 5
+"""
+import argparse
+import json
+import random
+
+import httpx
+
+from core.prompt import basePrompt, info_prompt, position_prompt
+
+POSITION = {"name": "Backend Python Developer",
+            "parameters": [{"name": "Python", "level": "senior"}, {"name": "PostgreSQL", "level": "middle"},
+                           {"name": "English", "level": "B2"}]}
+FIRST_NAMES = ["Олена", "Іван", "Марія", "Андрій", "Оксана", "Тарас", "Ірина", "Петро"]
+LAST_NAMES = ["Коваленко", "Шевченко", "Бондаренко", "Ткаченко", "Кравченко", "Мельник", "Бойко"]
+
+
+def _candidate_text(rng: random.Random):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    years = rng.randint(1, 12)
+    return (f"ПІБ: {name}\nДосвід: {years} років Python, Django, FastAPI, PostgreSQL.\n"
+            f"Освіта: КПІ, комп'ютерні науки.\nМови: англійська B{rng.randint(1, 2)}.\n"), name
+
+
+def _old_layout(text: str, evaluated: list):
+    position = json.dumps({**POSITION, "candidates": evaluated}, ensure_ascii=False)
+    return {"prompt": basePrompt + f"Дані про кандидата: {text}\nДані про посаду: {position}\n"}
+
+
+def _new_layout(text: str, evaluated: list):
+    position = json.dumps(POSITION, ensure_ascii=False)
+    return {"system": basePrompt + position_prompt.format(position=position),
+            "prompt": info_prompt.format(full_text=text, prompt="", additional_info="")}
+
+
+def _run(client: httpx.Client, model: str, layout, candidates: int, seed: int):
+    rng = random.Random(seed)
+    evaluated = []
+    tokens = 0
+    seconds = 0.0
+    for _ in range(candidates):
+        text, name = _candidate_text(rng)
+        body = {"model": model, "stream": False, "format": "json", "keep_alive": "30m",
+                "options": {"temperature": 0.0, "seed": 137, "num_predict": 1}, **layout(text, evaluated)}
+        data = client.post("/api/generate", json=body).json()
+        tokens += data.get("prompt_eval_count", 0)
+        seconds += data.get("prompt_eval_duration", 0) / 1e9
+        evaluated.append({"full_name": name})
+    return tokens, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ollama", default="http://localhost:11434")
+    parser.add_argument("--model", default="gemma3:12b")
+    parser.add_argument("--candidates", type=int, default=5)
+    args = parser.parse_args()
+
+    with httpx.Client(base_url=args.ollama, timeout=600) as client:
+        # warm-up so model loading is not counted
+        client.post("/api/generate", json={"model": args.model, "prompt": "", "keep_alive": "30m"})
+        results = {name: _run(client, args.model, layout, args.candidates, seed=1)
+                   for name, layout in (("old", _old_layout), ("prefix-stable", _new_layout))}
+
+    for name, (tokens, seconds) in results.items():
+        print(f"{name:>14}: {tokens} prompt tokens evaluated, {seconds:.2f}s prompt eval "
+              f"({seconds / args.candidates:.2f}s per candidate)")
+    old_seconds, new_seconds = results["old"][1], results["prefix-stable"][1]
+    if old_seconds:
+        print(f"prompt-eval time saved: {old_seconds - new_seconds:.2f}s ({1 - new_seconds / old_seconds:.0%})")
+
+
+if __name__ == "__main__":
+    main()
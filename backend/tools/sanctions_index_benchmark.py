@@ -0,0 +1,84 @@
+"""Builds a synthetic sanctions dataset and checks candidates against it in local mode, without network.
+
+Writes one dataset per ENDPOINTS_CONFIG source into `--dir`, plants known people in some of them, loads the index
+the same way the app does and reports correctness of the planted matches and the lookup latency.
+
+    python -m tools.sanctions_index_benchmark --dir /tmp/sanctions --records 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from services.sanctions_index import LocalSanctionsMirror
+from services.youcontrol_service import ENDPOINTS_CONFIG
+
+SURNAMES = ["Петренко", "Коваленко", "Шевчук", "Бондаренко", "Ткаченко", "Мельник", "Бойко", "Кравченко", "Литвин",
+            "Гнатюк", "Савченко", "Захарчук", "Левченко", "Дорошенко", "Олійник", "Поліщук", "Марченко"]
+FIRST_NAMES = ["Олександр", "Андрій", "Іван", "Тарас", "Максим", "Олена", "Ірина", "Оксана", "Софія", "Марія"]
+PATRONYMICS = ["Іванович", "Петрович", "Миколайович", "Сергіївна", "Олегівна", "Андріївна"]
+# (surname, first name, patronymic, birth date, source) of people that must be found
+PLANTED = [("Ярошенко", "Валерій", "Іванович", "1971-04-02", "/individualsRnboSanctions"),
+           ("Zakharchenko", "Viktor", None, "1963-01-01", "/individualsGlobalSanctionsLists"),
+           ("Вакуленко", "Ольга", "Петрівна", "1980-12-12", "/corruptedPersons")]
+
+
+def _random_record(rng: random.Random, index: int):
+    full_name = f"{rng.choice(SURNAMES)}{index} {rng.choice(FIRST_NAMES)} {rng.choice(PATRONYMICS)}"
+    return {"fullName": full_name, "birthDate": f"{rng.randint(1940, 2005)}-01-01", "id": index}
+
+
+def write_dataset(directory: str, records: int, seed: int = 1):
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    per_source = max(1, records // len(ENDPOINTS_CONFIG))
+    for n, endpoint in enumerate(ENDPOINTS_CONFIG):
+        with open(os.path.join(directory, endpoint.strip("/") + ".jsonl"), "w", encoding="utf-8") as f:
+            for i in range(per_source):
+                f.write(json.dumps(_random_record(rng, n * per_source + i), ensure_ascii=False) + "\n")
+            for surname, first_name, patronymic, birth_date, source in PLANTED:
+                if source == endpoint:
+                    record = {"surname": surname, "firstName": first_name, "patronymic": patronymic,
+                              "dateOfBirth": birth_date}
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+async def run(directory: str, records: int, lookups: int):
+    write_dataset(directory, records)
+    mirror = LocalSanctionsMirror(directory, reload_interval=3600)
+    started = time.perf_counter()
+    await mirror.start(ENDPOINTS_CONFIG)
+    print(f"index built in {time.perf_counter() - started:.2f}s")
+
+    checks = [("Ярошенко", "Валерій", "Іванович", 1971, "/individualsRnboSanctions", True),
+              ("Захарченко", "Віктор", None, 1963, "/individualsGlobalSanctionsLists", True),
+              ("Вакуленко", "Ольга", "Петрівна", 1981, "/corruptedPersons", False),
+              ("Ярошенко", "Валерій", "Петрович", 1971, "/individualsRnboSanctions", False)]
+    for surname, first_name, patronymic, year, endpoint, expected in checks:
+        result = mirror.check(endpoint, endpoint, surname, first_name, patronymic, year)
+        status = "ok" if result.match_found == expected else "WRONG"
+        print(f"{status}: {surname} {first_name} {patronymic or ''} {year} in {endpoint} -> {result.match_found}")
+
+    rng = random.Random(2)
+    started = time.perf_counter()
+    for _ in range(lookups):
+        for endpoint in ENDPOINTS_CONFIG:
+            mirror.check(endpoint, endpoint, rng.choice(SURNAMES), rng.choice(FIRST_NAMES), None, None)
+    elapsed = time.perf_counter() - started
+    print(f"{lookups} candidates x {len(ENDPOINTS_CONFIG)} sources: {elapsed / lookups * 1e6:.0f}us per candidate")
+    await mirror.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", default="/tmp/sanctions")
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.dir, args.records, args.lookups))
+
+
+if __name__ == "__main__":
+    main()
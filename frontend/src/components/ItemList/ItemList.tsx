@@ -18,30 +18,52 @@ interface ItemListProps {
   typeLink?: string;
 }
 
+interface ItemPage {
+  items: ItemList[];
+  next_cursor?: string | null;
+}
+
+const withCursor = (url: string, cursor: string | null) => {
+  if (!cursor) return url;
+  return `${url}${url.includes('?') ? '&' : '?'}after=${encodeURIComponent(cursor)}`;
+};
+
 const ItemList: React.FC<ItemListProps> = ({ sourceUrl, sourceList, typeLink }) => {
   const { t } = useTranslation();
   const [items, setItems] = React.useState<ItemList[]>([]);
   const [loading, setLoading] = React.useState<boolean>(true);
   const [error, setError] = React.useState<boolean>(false);
+  const [nextCursor, setNextCursor] = React.useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = React.useState<boolean>(false);
 
-  
-
-  React.useEffect(() => {
-    if (sourceUrl) {
-      setLoading(true);
-      setError(false);
-
-      fetch(sourceUrl)
+  const fetchPage = React.useCallback(
+    (url: string, cursor: string | null): Promise<ItemPage> =>
+      fetch(withCursor(url, cursor))
         .then((res) => {
           if (!res.ok) {
             throw new Error(`HTTP ${res.status}: Failed to fetch items`);
           }
           return res.json();
         })
-        .then((data: ItemList[] | { items: ItemList[] }) => {
-          // Support both direct array and { items: [...] } wrapper
-          const list = Array.isArray(data) ? data : data.items || [];
-          setItems(list);
+        .then((data: ItemList[] | ItemPage) =>
+          // Support both direct array and paginated { items, next_cursor } wrapper
+          Array.isArray(data)
+            ? { items: data, next_cursor: null }
+            : { items: data.items || [], next_cursor: data.next_cursor }
+        ),
+    []
+  );
+
+  React.useEffect(() => {
+    setNextCursor(null);
+    if (sourceUrl) {
+      setLoading(true);
+      setError(false);
+
+      fetchPage(sourceUrl, null)
+        .then((page) => {
+          setItems(page.items);
+          setNextCursor(page.next_cursor ?? null);
           setLoading(false);
         })
         .catch((err) => {
@@ -58,7 +80,23 @@ const ItemList: React.FC<ItemListProps> = ({ sourceUrl, sourceList, typeLink })
       setLoading(false);
       setError(false);
     }
-  }, [sourceUrl, sourceList]); 
+  }, [sourceUrl, sourceList, fetchPage]);
+
+  const loadMore = () => {
+    if (!sourceUrl || !nextCursor) return;
+    setLoadingMore(true);
+    fetchPage(sourceUrl, nextCursor)
+      .then((page) => {
+        setItems((previous) => [...previous, ...page.items]);
+        setNextCursor(page.next_cursor ?? null);
+      })
+      .catch((err) => {
+        console.error('ItemList fetch error:', err);
+        setError(true);
+      })
+      .finally(() => setLoadingMore(false));
+  };
+
   if (loading) {
     return (
       <div className="items-list-container">
@@ -114,6 +152,11 @@ const ItemList: React.FC<ItemListProps> = ({ sourceUrl, sourceList, typeLink })
           </li>
         ))}
       </ul>
+      {nextCursor && (
+        <div className="items-load-more">
+          <ButtonC1 text={t('ProfileComponent.load-more')} onClick={loadMore} disabled={loadingMore} />
+        </div>
+      )}
     </div>
   );
 };